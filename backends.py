@@ -0,0 +1,377 @@
+import numpy as np
+
+from .encoder import SparseRows
+
+
+# fraction the error must drop by for an epoch to count as an improvement
+PLATEAU = 0.01
+
+
+def sigmoid(summated):
+    "Sigmoid activation, applied in place"
+    np.negative(summated, out=summated)
+    np.exp(summated, out=summated)
+    summated += 1
+    np.reciprocal(summated, out=summated)
+    return summated
+
+
+class EarlyStop(object):
+    """
+    Decides when adaptive training can stop, given the mean squared error
+    of each epoch. Either once it's within a tolerance,
+    or once it's stopped improving for a number of epochs (patience)
+    """
+    def __init__(self, tolerance=0, patience=0):
+        self.tolerance = tolerance
+        self.patience = patience
+        self.best = np.inf
+        self.waited = 0
+
+    def __call__(self, error):
+        if error <= self.tolerance:
+            return True
+        if self.patience:
+            if error < self.best * (1 - PLATEAU):
+                self.best = error
+                self.waited = 0
+            else:
+                self.waited += 1
+                return self.waited >= self.patience
+        return False
+
+
+class Network(object):
+    """
+    Interface between a Respondant and its neural network.
+
+    Networks are built from a layer spec e.g. (inputs, hidden, outputs),
+    a step (learning rate), a numpy RandomState and optionally a dtype.
+    Weights are a list of arrays, one per layer,
+    each with the bias as its first row.
+    """
+    def train(self, input_data, target_data, epochs, tolerance=0, patience=0):
+        """
+        Trains the network on a batch of rows, for a number of epochs.
+        Adaptive if given a tolerance or patience, stopping early
+        (see EarlyStop), so the epochs are the most it will train for.
+        Returns the number of epochs trained
+        """
+        raise NotImplementedError
+
+    def predict(self, input_data):
+        "Returns the network output for each row, as a 2D array"
+        raise NotImplementedError
+
+    def get_weights(self):
+        "Returns a copy of the weights"
+        raise NotImplementedError
+
+    def set_weights(self, weights):
+        "Replaces the weights, which must match the layer spec"
+        raise NotImplementedError
+
+
+class NumpyNetwork(Network):
+    """
+    Lean backpropagation network written with numpy.
+
+    Matches the neupy Backpropagation defaults, sigmoid layers with a bias,
+    gaussian initial weights & mean squared error. The weights, activations
+    & gradients are preallocated and updated in place.
+
+    Inputs can also be encoder.SparseRows, for which the first layer
+    gathers & updates only the weight rows of the inputs switched on.
+    """
+    # takes SparseRows as well as dense inputs
+    sparse = True
+
+    def __init__(self, layers, step=0.1, rng=None, dtype=float):
+        if len(layers) < 2:
+            raise ValueError("Network must contain at least 2 layers")
+        self.layers = tuple(layers)
+        self.step = step
+        self.dtype = np.dtype(dtype)
+        rng = np.random if rng is None else rng
+        # drawn the same whatever the dtype, then converted
+        self.weights = [rng.randn(size + 1, following).astype(dtype)
+                        for size, following in zip(layers[:-1], layers[1:])]
+        self.gradients = [np.zeros_like(w) for w in self.weights]
+        # buffers per layer, grown when a larger batch is passed
+        self.capacity = 0
+        self.allocate(1)
+
+    def allocate(self, rows):
+        "Ensures there are buffers for at least a given number of rows"
+        if rows > self.capacity:
+            self.capacity = rows
+            sizes = self.layers[1:]
+            self.activations = [np.empty((rows, s), dtype=self.dtype)
+                                for s in sizes]
+            self.deltas = [np.empty((rows, s), dtype=self.dtype)
+                           for s in sizes]
+            self.scratch = [np.empty((rows, s), dtype=self.dtype)
+                            for s in sizes]
+
+    def forward(self, inputs):
+        "Passes rows through the network, returning the outputs of each layer"
+        rows = len(inputs)
+        self.allocate(rows)
+        outputs = [inputs]
+        for weight, activation in zip(self.weights, self.activations):
+            summated = activation[:rows]
+            if isinstance(outputs[-1], SparseRows):
+                self.gather(outputs[-1], summated)
+            else:
+                np.dot(outputs[-1], weight[1:], out=summated)
+                summated += weight[0]
+            outputs.append(sigmoid(summated))
+        return outputs
+
+    def gather(self, inputs, out):
+        "Sums the first layer for SparseRows, from the rows switched on"
+        weight = self.weights[0]
+        values = inputs.values
+        np.dot(values, weight[len(weight) - values.shape[1]:], out=out)
+        out += weight[0]
+        # weight rows of the inputs switched on (rows x slots x outputs)
+        gathered = weight[1 + inputs.columns]
+        if inputs.off is not None:
+            gathered[inputs.off] = 0.0
+        out += gathered.sum(axis=1)
+
+    def scatter(self, inputs, delta):
+        """Updates the first layer for SparseRows, given its (step scaled)
+        deltas, only touching the rows of the inputs switched on"""
+        weight = self.weights[0]
+        values = inputs.values
+        weight[len(weight) - values.shape[1]:] -= np.dot(values.T, delta)
+        weight[0] -= delta.sum(axis=0)
+        slots = inputs.columns.shape[1]
+        columns = inputs.columns.ravel()
+        deltas = np.repeat(delta, slots, axis=0)
+        if inputs.off is not None:
+            on = columns >= 0
+            columns, deltas = columns[on], deltas[on]
+        # unbuffered, so repeated columns all count
+        np.subtract.at(weight, 1 + columns, deltas)
+
+    def train(self, input_data, target_data, epochs=100,
+              tolerance=0, patience=0):
+        inputs = input_data if isinstance(input_data, SparseRows) \
+            else np.asarray(input_data, dtype=self.dtype)
+        rows = len(inputs)
+        target = np.asarray(target_data, dtype=self.dtype).reshape(rows, -1)
+        # derivative of the mean squared error
+        scale = 2.0 / rows
+        stop = EarlyStop(tolerance, patience) if tolerance or patience \
+            else None
+
+        for epoch in range(epochs):
+            outputs = self.forward(inputs)
+            error = self.deltas[-1][:rows]
+            np.subtract(outputs[-1], target, out=error)
+            # the error of this epoch comes free from the forward pass
+            if stop is not None:
+                flat = error.ravel()
+                if stop(np.dot(flat, flat) / flat.size):
+                    return epoch
+            error *= scale
+
+            for i in reversed(range(len(self.weights))):
+                weight, gradient = self.weights[i], self.gradients[i]
+                output, delta = outputs[i + 1], self.deltas[i][:rows]
+                scratch = self.scratch[i][:rows]
+                # back through the sigmoid
+                np.subtract(1, output, out=scratch)
+                scratch *= output
+                delta *= scratch
+                # pass the error back, before this layer is updated
+                if i:
+                    np.dot(delta, weight[1:].T, out=self.deltas[i - 1][:rows])
+                elif isinstance(inputs, SparseRows):
+                    delta *= self.step
+                    self.scatter(inputs, delta)
+                    continue
+                np.dot(outputs[i].T, delta, out=gradient[1:])
+                delta.sum(axis=0, out=gradient[0])
+                gradient *= self.step
+                weight -= gradient
+        return epochs
+
+    def predict(self, input_data):
+        inputs = input_data if isinstance(input_data, SparseRows) \
+            else np.asarray(input_data, dtype=self.dtype)
+        # copied, as the activations are reused
+        return self.forward(inputs)[-1].copy()
+
+    def get_weights(self):
+        return [w.copy() for w in self.weights]
+
+    def set_weights(self, weights):
+        for current, new in zip(self.weights, weights):
+            if current.shape != np.shape(new):
+                raise ValueError("Weights must match the network layers")
+            current[:] = new
+
+
+class StackedNetwork(object):
+    """
+    A stack of identically shaped NumpyNetworks, held as one tensor
+    per layer (networks x inputs + bias x outputs) so they can all
+    predict & train together with batched matrix multiplications.
+
+    Every network is given its own batch of rows, as a
+    (networks x rows x inputs) array.
+    """
+    def __init__(self, layers, step=0.1, size=1, rng=None, dtype=float):
+        if len(layers) < 2:
+            raise ValueError("Network must contain at least 2 layers")
+        self.layers = tuple(layers)
+        self.step = step
+        self.size = size
+        self.dtype = np.dtype(dtype)
+        rng = np.random if rng is None else rng
+        self.weights = [rng.randn(size, inputs + 1, outputs).astype(dtype)
+                        for inputs, outputs in zip(layers[:-1], layers[1:])]
+        self.gradients = [np.zeros_like(w) for w in self.weights]
+        # activation, delta & scratch buffers per number of rows
+        self.cache = {}
+
+    def buffers(self, rows):
+        "Returns the buffers for a given number of rows per network"
+        if rows not in self.cache:
+            sizes = self.layers[1:]
+            self.cache[rows] = tuple(
+                [np.empty((self.size, rows, s), dtype=self.dtype)
+                 for s in sizes]
+                for i in range(3))
+        return self.cache[rows]
+
+    def forward(self, inputs):
+        "Passes rows through the networks, returning the outputs per layer"
+        activations = self.buffers(inputs.shape[1])[0]
+        outputs = [inputs]
+        for weight, summated in zip(self.weights, activations):
+            np.matmul(outputs[-1], weight[:, 1:], out=summated)
+            summated += weight[:, :1]
+            outputs.append(sigmoid(summated))
+        return outputs
+
+    def train(self, input_data, target_data, epochs=100):
+        "Trains every network on its own rows, returning the epochs trained"
+        inputs = np.asarray(input_data, dtype=self.dtype)
+        rows = inputs.shape[1]
+        target = np.asarray(target_data, dtype=self.dtype).reshape(
+            self.size, rows, -1)
+        activations, deltas, scratch = self.buffers(rows)
+        # derivative of the mean squared error, per network
+        scale = 2.0 / rows
+
+        for epoch in range(epochs):
+            outputs = self.forward(inputs)
+            np.subtract(outputs[-1], target, out=deltas[-1])
+            deltas[-1] *= scale
+
+            for i in reversed(range(len(self.weights))):
+                weight, gradient = self.weights[i], self.gradients[i]
+                output, delta = outputs[i + 1], deltas[i]
+                # back through the sigmoid
+                np.subtract(1, output, out=scratch[i])
+                scratch[i] *= output
+                delta *= scratch[i]
+                # pass the error back, before this layer is updated
+                if i:
+                    np.matmul(delta, weight[:, 1:].transpose(0, 2, 1),
+                              out=deltas[i - 1])
+                np.matmul(outputs[i].transpose(0, 2, 1), delta,
+                          out=gradient[:, 1:])
+                delta.sum(axis=1, out=gradient[:, 0])
+                gradient *= self.step
+                weight -= gradient
+        return epochs
+
+    def predict(self, input_data):
+        "Returns a (networks x rows x outputs) array"
+        inputs = np.asarray(input_data, dtype=self.dtype)
+        return self.forward(inputs)[-1].copy()
+
+    def get_weights(self, index=None):
+        "Copy of every network's weights, or of a single network"
+        if index is None:
+            return [w.copy() for w in self.weights]
+        return [w[index].copy() for w in self.weights]
+
+    def set_weights(self, weights, index=None):
+        "Replaces every network's weights, or a single network's"
+        for current, new in zip(self.weights, weights):
+            target = current if index is None else current[index]
+            if target.shape != np.shape(new):
+                raise ValueError("Weights must match the network layers")
+            target[:] = new
+
+
+class NeupyNetwork(Network):
+    """
+    Backpropagation network from the neupy framework, always float64.
+    Experimental: written against neupy 0.1.4, which isn't tested with
+    the numpy versions the rest of the package needs
+    """
+    def __init__(self, layers, step=0.1, rng=None, dtype=float):
+        # optional dependency, only needed if this backend is used
+        from neupy import algorithms
+        self.net = algorithms.Backpropagation(tuple(layers), step=step)
+        # neupy draws from the global random state, so redraw the weights
+        if rng is not None:
+            self.set_weights([rng.randn(*w.shape)
+                              for w in self.get_weights()])
+
+    def train(self, input_data, target_data, epochs=100,
+              tolerance=0, patience=0):
+        if not (tolerance or patience):
+            self.net.train(input_data, target_data, epochs=epochs)
+            return epochs
+        # a single epoch at a time, checking the error in between
+        stop = EarlyStop(tolerance, patience)
+        target = np.asarray(target_data, dtype=float)
+        for epoch in range(epochs):
+            error = self.predict(input_data) - target.reshape(len(target), -1)
+            if stop(np.mean(np.square(error))):
+                return epoch
+            self.net.train(input_data, target_data, epochs=1)
+        return epochs
+
+    def predict(self, input_data):
+        return self.net.predict(input_data)
+
+    def get_weights(self):
+        return [layer.weight.copy() for layer in self.net.train_layers]
+
+    def set_weights(self, weights):
+        for layer, new in zip(self.net.train_layers, weights):
+            if layer.weight.shape != np.shape(new):
+                raise ValueError("Weights must match the network layers")
+            layer.weight[:] = new
+
+
+BACKENDS = {
+    'numpy': NumpyNetwork,
+    'neupy': NeupyNetwork,
+}
+
+
+def build_network(backend, layers, step, rng=None, dtype=None):
+    """
+    Builds a network, given either the name of a backend
+    or a class/callable taking (layers, step, rng)
+    and also a dtype, if one is given
+    """
+    if isinstance(backend, str):
+        try:
+            backend = BACKENDS[backend]
+        except KeyError:
+            raise ValueError("%s is not a valid backend, choose from %s" % (
+                backend, ", ".join(sorted(BACKENDS))))
+    if dtype is None:
+        return backend(layers, step, rng)
+    return backend(layers, step, rng, dtype)
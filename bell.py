@@ -0,0 +1,98 @@
+"""
+Definitions of the salivation (bell) experiment, see test_bell
+"""
+from collections import OrderedDict
+import numpy as np
+
+from .pavlov import Respondant
+
+# ENVIRONMENT VARIABLES
+
+FOOD_KEY = 'food_present'
+SALIVATION_KEY = 'saliver_levels'
+
+# ACTIONS
+
+
+def salivate(environment):
+    "Salivates"
+    # starts salivating
+    environment[SALIVATION_KEY] = 1.0
+    return 0.0, environment
+
+
+def rest(environment):
+    "Just sits and rests"
+    return 0.1, environment
+
+
+def eat(environment):
+    "Eats food and is the best thing ever!"
+    # eats food
+    environment[FOOD_KEY] = 0.0
+    # if salivating, then give bigger food kick
+    if environment[SALIVATION_KEY]:
+        environment[SALIVATION_KEY] = 0.0
+        return 1.0, environment
+    else:
+        return 0.5, environment
+
+
+def bell_with_food(environment):
+    "Food is given when bell is rung"
+    environment[FOOD_KEY] = 1.0
+    return 0.0, environment
+
+
+def bell_without_food(environment):
+    "No food given or taken away"
+    return 0.0, environment
+
+
+ACTIONS = [salivate, rest, eat]
+STIMULI = [bell_without_food, bell_with_food]
+
+
+NO_FOOD = {FOOD_KEY: 0.0, SALIVATION_KEY: 0.0}
+FOOD = {FOOD_KEY: 1.0, SALIVATION_KEY: 0.0}
+HIGH_SALIVATION = {FOOD_KEY: 1.0, SALIVATION_KEY: 1.0}
+
+
+def bell_subject(**kwargs):
+    "Respondant for the salivation experiment"
+    return Respondant(
+        actions=ACTIONS,
+        stimuli=STIMULI,
+        environment={
+            FOOD_KEY: 0,
+            SALIVATION_KEY: 0,
+        },
+        hidden_layers=6,
+        sequence_memory=1, **kwargs)
+
+
+def salivation(subject):
+    "Runs the experiment, returning the decisions made after each phase"
+    decisions = OrderedDict()
+
+    # learns to rest as standard
+    for i in range(200):
+        subject.learn(subject.decide(randomised=0.5))
+    decisions['1. No food'] = subject.decide(NO_FOOD)
+
+    # ring bell occasionally
+    for i in range(200):
+        if i % 10:
+            subject.learn(bell_with_food)
+        subject.learn(subject.decide(randomised=0.8))
+    decisions['2. No food'] = subject.decide(NO_FOOD)
+    decisions['2. Food'] = subject.decide(FOOD)
+    decisions['2. Food, salivating'] = subject.decide(HIGH_SALIVATION)
+    return decisions
+
+
+def predictions(subject):
+    "Predicted outcome of every action, in each of the environments"
+    return np.array([[subject.predict(action, environment)
+                      for action in ACTIONS]
+                     for environment in (NO_FOOD, FOOD, HIGH_SALIVATION)])
@@ -0,0 +1,227 @@
+"""
+Benchmarks, run from the directory above the package e.g.
+    python -m pavlov.benchmark import --budget 0.5
+    python -m pavlov.benchmark run --output before.json
+    python -m pavlov.benchmark compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from timeit import default_timer
+
+
+# name the package is imported as, and the directory it's imported from
+PACKAGE = __package__
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# seconds a worker process may spend importing pavlov
+IMPORT_BUDGET = 0.5
+# fraction slower than before a benchmark can be, before it's flagged
+SLOWDOWN = 0.1
+
+# Respondant sizes benchmarked, each varying one option from the base
+BASE_CASE = {'actions': 2, 'sequence_memory': 1, 'environment': 2,
+             'hidden_layers': 2, 'verbose_neurons': True, 'sparse': False}
+VARIED = {
+    'actions': [8, 32],
+    'sequence_memory': [0, 4],
+    'environment': [8, 32],
+    'hidden_layers': [8, 32],
+    'verbose_neurons': [False],
+    'sparse': [True],
+}
+
+IMPORT_CODE = """
+import sys, time
+start = time.perf_counter()
+import %s
+print(time.perf_counter() - start)
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def fresh_import(module='pavlov'):
+    """Imports a module of the package in a fresh interpreter,
+    returning the seconds taken & names of all the modules it loaded"""
+    name = '%s.%s' % (PACKAGE, module)
+    output = subprocess.check_output(
+        [sys.executable, '-c', IMPORT_CODE % name], cwd=ROOT)
+    seconds, modules = output.decode().splitlines()
+    return float(seconds), set(modules.split())
+
+
+def import_time(module='pavlov', repeat=5):
+    "Best time in seconds to import a module, in a fresh interpreter"
+    return min(fresh_import(module)[0] for i in range(repeat))
+
+
+def cases():
+    "Options of every Respondant size benchmarked"
+    found = [dict(BASE_CASE)]
+    for key, values in sorted(VARIED.items()):
+        for value in values:
+            case = dict(BASE_CASE)
+            case[key] = value
+            found.append(case)
+    return found
+
+
+def case_name(case):
+    return ' '.join('%s=%s' % (key, case[key]) for key in sorted(case))
+
+
+def build(actions=2, sequence_memory=1, environment=2, hidden_layers=2,
+          verbose_neurons=True, sparse=False, seed=0):
+    """A Respondant with a number of generated actions & environment keys,
+    and a scenario per action"""
+    from .pavlov import Respondant
+    keys = ['e%s' % i for i in range(environment)]
+
+    def action(i):
+        def toggle(env):
+            if keys:
+                key = keys[i % len(keys)]
+                env[key] = 1 - env[key]
+            return float(i + 1) / (actions + 1), env
+        toggle.__name__ = 'action_%s' % i
+        return toggle
+
+    events = [action(i) for i in range(actions)]
+    start = dict((key, 0.0) for key in keys)
+    return Respondant(
+        actions=events, environment=start, sequence_memory=sequence_memory,
+        hidden_layers=hidden_layers, verbose_neurons=verbose_neurons,
+        sparse=sparse,
+        scenarios=dict((e.__name__, (e, start)) for e in events), seed=seed)
+
+
+def throughput(steps=50, **case):
+    """Steps per second of learn, decide & store_predictions
+    for a Respondant built with the options, see build"""
+    subject = build(**case)
+    rates = {}
+
+    start = default_timer()
+    for i in range(steps):
+        subject.decide(randomised=0.5)
+    rates['decide'] = steps / (default_timer() - start)
+
+    start = default_timer()
+    for i in range(steps):
+        subject.learn(subject.actions[i % len(subject.actions)])
+    rates['learn'] = steps / (default_timer() - start)
+
+    start = default_timer()
+    for i in range(steps):
+        subject.store_predictions()
+    rates['store_predictions'] = steps / (default_timer() - start)
+    return rates
+
+
+def learned_helplessness():
+    "Steps per second of the whole learned helplessness experiment"
+    from .gate import SEED, helpless_subject
+    from .gate import learned_helplessness as experiment
+    subject = helpless_subject(seed=SEED)
+    start = default_timer()
+    experiment(subject)
+    return subject.history.total / (default_timer() - start)
+
+
+def salivation():
+    "Steps per second of the bell & food salivation experiment"
+    from .bell import bell_subject
+    from .bell import salivation as experiment
+    subject = bell_subject(seed=0)
+    start = default_timer()
+    experiment(subject)
+    return subject.history.total / (default_timer() - start)
+
+
+def run(steps=50, experiments=True):
+    """
+    Runs every benchmark, returning a dict of results (steps per second)
+    by name, with details of where they were run
+    """
+    results = {}
+    for case in cases():
+        for method, rate in throughput(steps, **case).items():
+            results['%s %s' % (method, case_name(case))] = rate
+    if experiments:
+        results['experiment learned_helplessness'] = learned_helplessness()
+        results['experiment salivation'] = salivation()
+
+    import numpy
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(),
+            'numpy': numpy.__version__, 'machine': platform.machine(),
+            'results': results}
+
+
+def compare(before, after, slowdown=SLOWDOWN):
+    """
+    Compares two sets of results from run, returning those which are
+    more than the slowdown fraction slower, as (name, before, after)
+    """
+    slower = []
+    for name, rate in sorted(after['results'].items()):
+        old = before['results'].get(name)
+        if old and rate < old * (1 - slowdown):
+            slower.append((name, old, rate))
+    return slower
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest='command')
+    command = commands.add_parser('import', help='time to import a module')
+    command.add_argument('--module', default='pavlov')
+    command.add_argument('--repeat', type=int, default=5)
+    command.add_argument('--budget', type=float, default=IMPORT_BUDGET)
+    command = commands.add_parser('run', help='steps per second, as JSON')
+    command.add_argument('--output', help='file to save the results to')
+    command.add_argument('--steps', type=int, default=50)
+    command.add_argument('--quick', action='store_true',
+                         help='skip the end to end experiments')
+    command = commands.add_parser('compare', help='flag any slowdowns')
+    command.add_argument('before')
+    command.add_argument('after')
+    command.add_argument('--slowdown', type=float, default=SLOWDOWN)
+    args = parser.parse_args(args)
+
+    if args.command == 'import':
+        seconds = import_time(args.module, args.repeat)
+        print('import %s: %.3fs (budget %.3fs)' % (
+            args.module, seconds, args.budget))
+        return 0 if seconds <= args.budget else 1
+    if args.command == 'run':
+        results = run(args.steps, experiments=not args.quick)
+        for name, rate in sorted(results['results'].items()):
+            print('%-80s %10.1f/s' % (name, rate))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+        return 0
+    if args.command == 'compare':
+        with open(args.before) as f:
+            before = json.load(f)
+        with open(args.after) as f:
+            after = json.load(f)
+        slower = compare(before, after, args.slowdown)
+        for name, old, new in slower:
+            print('%-80s %10.1f/s -> %10.1f/s (%.0f%% slower)' % (
+                name, old, new, 100 * (1 - new / old)))
+        return 1 if slower else 0
+    parser.print_help()
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class PredictionCache(object):
+    """
+    Least recently used cache of predicted outcomes, keyed on the encoded
+    state they were predicted for (events, environment & history).
+
+    Entries are only valid for one version of the network weights,
+    so the whole cache is dropped when it's asked for another version.
+    """
+    def __init__(self, size=1024):
+        if size < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.size = size
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        "Cached value for a key & weight version, or None"
+        if version != self.version:
+            self.entries.clear()
+            self.version = version
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        "Caches a value, for the version last asked for"
+        self.entries[key] = value
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def stats(self):
+        "Dict of the hits, misses, hit rate & entries held"
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self.entries)}
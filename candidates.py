@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class RecentBest(object):
+    """
+    Learned candidate filter for Respondant.decide, remembering
+    the best actions recently decided on for each encoded state
+    (environment & sequence memory).
+
+    The candidates for a state are those remembered, plus a random sample
+    of explore others so new favourites can still be found.
+    Every action is a candidate for a state not seen recently.
+    Only the most recent states are kept.
+    """
+    def __init__(self, remember=4, explore=4, states=1024):
+        self.remember = remember
+        self.explore = explore
+        self.states = states
+        # state key to its best actions, most recent first
+        self.best = OrderedDict()
+
+    def key(self, respondant, environment=None):
+        "Encoded state of a respondant, as bytes"
+        encoder = respondant.encoder
+        if environment is None:
+            environment = respondant.environment
+        return (encoder.environment_values(environment).tobytes() +
+                encoder.window.tobytes())
+
+    def __call__(self, respondant, environment=None):
+        "Candidate actions in an environment, None for all of them"
+        key = self.key(respondant, environment)
+        if key not in self.best:
+            return None
+        self.best.move_to_end(key)
+        remembered = self.best[key]
+        others = [a for a in respondant.actions if a not in remembered]
+        if self.explore and others:
+            picked = respondant.rng.choice(
+                len(others), min(self.explore, len(others)), replace=False)
+            return remembered + [others[i] for i in sorted(picked)]
+        return list(remembered)
+
+    def update(self, respondant, environment, best):
+        "Remembers the best actions decided on in an environment"
+        key = self.key(respondant, environment)
+        remembered = self.best.pop(key, [])
+        remembered = list(best) + [a for a in remembered if a not in best]
+        self.best[key] = remembered[:self.remember]
+        while len(self.best) > self.states:
+            self.best.popitem(last=False)
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+import numpy as np
+
+from .backends import StackedNetwork
+from .dynamics import ArrayEvent
+from .encoder import Encoder
+from .pavlov import (DTYPE, EPOCHS, LAYERS, STEPS, Respondant,
+                     normalised_dict_from_list)
+
+
+class Cohort(object):
+    """
+    A group of respondants sharing one architecture
+    (actions, stimuli, environment keys & network layers)
+    stepped through an experiment in lockstep.
+
+    Their networks are held as one StackedNetwork, so every member
+    decides & learns in a single batched pass through the network.
+    The members' environments are held as one (members x keys) array.
+    ArrayEvents (see dynamics) are applied to every member they happen to
+    at once, other event callables are run per member on a dict of its own.
+    """
+    def __init__(self, size,
+                 actions=None, environment=None, stimuli=None,
+                 sequence_memory=0, verbose_neurons=True,
+                 hidden_layers=LAYERS, steps=STEPS, seed=None, dtype=DTYPE):
+        if size < 1:
+            raise ValueError("A cohort needs at least 1 member")
+        self.size = size
+        self.rng = np.random.RandomState(seed)
+
+        self.actions = tuple() if actions is None else tuple(actions)
+        self.stimuli = tuple() if stimuli is None else tuple(stimuli)
+        self.events = normalised_dict_from_list(self.actions + self.stimuli)
+        # to find the events from their table rows
+        self.event_list = list(self.events)
+
+        environment = environment or {}
+        if sequence_memory < 0 or type(sequence_memory) is not int:
+            raise ValueError("Sequence_memory must be a postive real number")
+        self.sequence_memory = sequence_memory
+        self.verbose_neurons = verbose_neurons
+        self.hidden_layers = hidden_layers
+        self.steps = steps
+        self.dtype = np.dtype(dtype)
+
+        self.encoder = Encoder(self.events, environment.keys(),
+                               sequence_memory, verbose_neurons, dtype)
+        # every member starts in the same environment
+        self.values = np.tile(self.encoder.environment_values(environment),
+                              (size, 1))
+        self.action_indices = np.tile(self.encoder.indices(self.actions),
+                                      (size, 1))
+        # encoded memory of every member, latest first (-1 if none yet)
+        self.windows = np.full((size, sequence_memory), -1, dtype=int)
+
+        self.net = StackedNetwork((self.encoder.width, hidden_layers, 1),
+                                  steps, size, self.rng, dtype)
+
+    def environment(self, index):
+        "A member's environment, as a dict"
+        return OrderedDict(zip(self.encoder.keys, self.values[index].tolist()))
+
+    @property
+    def environments(self):
+        "Every member's environment, as a list of dicts"
+        return [self.environment(i) for i in range(self.size)]
+
+    def environment_values(self, environment=None):
+        """Every member's environment as a (members x keys) array,
+        or if passed, the same environment for all of them"""
+        if environment is not None:
+            return np.tile(self.encoder.environment_values(environment),
+                           (self.size, 1))
+        return self.values
+
+    def update_environment(self, values):
+        "Updates the environment of every member e.g. to close a gate"
+        columns = ArrayEvent.columns(self.encoder.keys)
+        for key, value in values.items():
+            if key not in columns:
+                raise KeyError("Passed environment must match staring env")
+            if not value <= 1.0:
+                raise ValueError(
+                    "%s env var is %s exceeding maximum 1.0" % (key, value))
+            self.values[:, columns[key]] = value
+
+    def scores(self, environment=None):
+        "Predicted outcome of every action, as a (members x actions) array"
+        inputs = self.encoder.encode_batch(
+            self.action_indices, self.windows,
+            self.environment_values(environment))
+        return self.net.predict(inputs)[..., 0]
+
+    def predict(self, event, environment=None):
+        "Every member's prediction of the outcome of an event"
+        indices = np.full((self.size, 1), self.encoder.lookup(event))
+        inputs = self.encoder.encode_batch(
+            indices, self.windows, self.environment_values(environment))
+        return self.net.predict(inputs)[:, 0, 0]
+
+    def decide(self, environment=None, randomised=0, members=None):
+        """The best action of every member, see Respondant.decide.
+        If given a list of members, only they decide (drawing noise
+        for just them) and the rest are None"""
+        if not self.actions:
+            return [None] * self.size
+        outcomes = self.scores(environment)
+        if members is None:
+            members = np.arange(self.size)
+        noise = self.rng.random_sample((len(members), len(self.actions)))
+        best = np.argmax(outcomes[members] + randomised * noise, axis=1)
+        decisions = [None] * self.size
+        for member, i in zip(members, best):
+            decisions[member] = self.actions[i]
+        return decisions
+
+    def learn(self, events, epochs=EPOCHS):
+        """Every member learns from its own event (a list of events),
+        or all from the same event"""
+        if callable(events):
+            events = [events] * self.size
+        if len(events) != self.size:
+            raise ValueError("Must pass an event for every member")
+
+        # inputs are from before the events change the environments
+        indices = self.encoder.indices(events)[:, None]
+        inputs = self.encoder.encode_batch(indices, self.windows,
+                                           self.environment_values())
+        outcomes = np.empty(self.size, dtype=self.dtype)
+        for event in dict.fromkeys(events):
+            rows = np.array([e is event for e in events])
+            if isinstance(event, ArrayEvent):
+                # in one go for every member it happens to
+                values = self.values[rows]
+                outcomes[rows] = event.apply(values, self.encoder.keys)
+                if not (values <= 1.0).all():
+                    raise ValueError("%s set an env var exceeding maximum "
+                                     "1.0" % event.__name__)
+                self.values[rows] = values
+                continue
+            for i in np.flatnonzero(rows):
+                outcomes[i], environment = event(self.environment(i))
+                self.values[i] = self.encoder.environment_values(environment)
+
+        self.net.train(inputs, outcomes.reshape(self.size, 1, 1), epochs)
+
+        # shift every member's memory along
+        if self.sequence_memory:
+            self.windows[:, 1:] = self.windows[:, :-1]
+            self.windows[:, 0] = indices[:, 0]
+
+    def step(self, randomised=0, stimulus=None, probability=0,
+             epochs=EPOCHS):
+        """
+        A single step of an experiment, every member decides what to do
+        and learns from it. Unless (with the given probability)
+        the stimulus happens to them instead.
+        Returns the events learnt from
+        """
+        events = self.decide(randomised=randomised)
+        if stimulus is not None and probability:
+            hit = self.rng.random_sample(self.size) < probability
+            events = [stimulus if h else e for h, e in zip(hit, events)]
+        self.learn(events, epochs)
+        return events
+
+    def respondant(self, index, **kwargs):
+        "A standalone copy of one of the members, as a Respondant"
+        subject = Respondant(
+            actions=self.actions, stimuli=self.stimuli,
+            environment=self.environment(index),
+            sequence_memory=self.sequence_memory,
+            verbose_neurons=self.verbose_neurons,
+            hidden_layers=self.hidden_layers, steps=self.steps,
+            dtype=self.dtype, **kwargs)
+        subject.net.set_weights(self.net.get_weights(index))
+        # replay the remembered events, oldest first
+        for row in self.windows[index][::-1]:
+            if row >= 0:
+                subject.history.append(self.event_list[row])
+                subject.encoder.push(self.event_list[row])
+        return subject
@@ -0,0 +1,76 @@
+import numpy as np
+
+
+class ArrayEvent(object):
+    """
+    An event acting on a whole batch of environments at once,
+    held as an (environments x keys) float array.
+
+    function(values, columns) updates the values in place and returns
+    the outcome of every row (or a single outcome for them all),
+    columns maps each environment key to its column.
+    Still callable with a dict environment, like any other event,
+    so can be used with a Respondant as well as a Cohort
+    """
+    def __init__(self, function, name=None, module=None):
+        self.function = function
+        self.__name__ = name or function.__name__
+        self.__qualname__ = self.__name__
+        self.__module__ = module or getattr(function, '__module__',
+                                            __name__)
+
+    def __repr__(self):
+        return '<%s %s>' % (type(self).__name__, self.__name__)
+
+    @staticmethod
+    def columns(keys):
+        "Column of each key in the layout"
+        return dict((key, i) for i, key in enumerate(keys))
+
+    def apply(self, values, keys):
+        """Applies the event to every row of values, laid out in the order
+        of keys, in place. Returns the outcome of each row"""
+        outcomes = self.function(values, self.columns(keys))
+        return np.broadcast_to(np.asarray(outcomes, dtype=values.dtype),
+                               (len(values),))
+
+    def __call__(self, environment):
+        keys = tuple(environment)
+        values = np.array([[environment[key] for key in keys]], dtype=float)
+        outcome = self.apply(values, keys)[0]
+        environment.update(zip(keys, values[0].tolist()))
+        return float(outcome), environment
+
+
+class Rule(ArrayEvent):
+    """
+    An ArrayEvent declared as simple rules rather than a function.
+    set is a dict of the environment values it sets & clear the keys it
+    sets to 0. The outcome is the same for every environment, unless any
+    of the when (key, outcome) pairs matches, where the key is on (> 0)
+    before the event, with the first match taking precedence e.g.
+
+        eat = Rule('eat', 0.5, clear=[FOOD, SALIVATION],
+                   when=[(SALIVATION, 1.0)])
+    """
+    def __init__(self, name, outcome=0.0, set=None, clear=(), when=(),
+                 module=None):
+        self.outcome = outcome
+        self.set = dict(set or {})
+        self.set.update((key, 0.0) for key in clear)
+        self.when = tuple(when)
+        super(Rule, self).__init__(None, name, module or __name__)
+
+    def apply(self, values, keys):
+        columns = self.columns(keys)
+        try:
+            outcomes = np.full(len(values), self.outcome, dtype=values.dtype)
+            # in reverse, so the first match is written last
+            for key, outcome in reversed(self.when):
+                outcomes[values[:, columns[key]] > 0] = outcome
+            for key, value in self.set.items():
+                values[:, columns[key]] = value
+        except KeyError as e:
+            raise KeyError("%s isn't in the environment of %s"
+                           % (e.args[0], self.__name__))
+        return outcomes
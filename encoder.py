@@ -0,0 +1,228 @@
+import numpy as np
+
+
+class SparseRows(object):
+    """
+    Network input rows held sparsely, for verbose (one hot) events.
+    columns holds the index of the input switched on for each memory slot
+    (rows x slots), or -1 if none. values holds the dense inputs
+    (rows x values) which fill the final columns of each row.
+    Only the first layer of a network needs to know, see NumpyNetwork
+    """
+    def __init__(self, columns, values, width):
+        self.columns = columns
+        self.values = values
+        self.width = width
+        # slots without an input switched on, None if there are none
+        off = columns < 0
+        self.off = off if off.any() else None
+
+    def __len__(self):
+        return len(self.columns)
+
+    def dense(self):
+        "The same rows as a dense array"
+        rows = np.zeros((len(self), self.width), dtype=self.values.dtype)
+        for slot in range(self.columns.shape[1]):
+            on = self.columns[:, slot] >= 0
+            rows[np.flatnonzero(on), self.columns[on, slot]] = 1.0
+        rows[:, self.width - self.values.shape[1]:] = self.values
+        return rows
+
+
+class Encoder(object):
+    """
+    Compiled version of the network inputs for a Respondant.
+
+    Built once with the events and environment keys, it holds
+    a lookup from event to table row and a fixed environment order,
+    so that input rows are written straight into a numpy buffer.
+
+    Each row is laid out as
+    [current event][historical events, latest first][environment]
+    and is of the given dtype, as are the network weights
+    """
+    def __init__(self, events, environment_keys=(),
+                 sequence_memory=0, verbose_neurons=True, dtype=float):
+        # events is the normalised (ordered) dict of the Respondant
+        self.events = events
+        self.index = dict((e, i) for i, e in enumerate(events))
+        self.sequence_memory = sequence_memory
+        self.verbose_neurons = verbose_neurons
+        self.dtype = np.dtype(dtype)
+
+        if verbose_neurons:
+            # one hot row per event, with a final blank row
+            # for any event which isn't known (all inputs "off")
+            self.table = np.vstack([np.eye(len(events), dtype=dtype),
+                                    np.zeros((1, len(events)), dtype=dtype)])
+        else:
+            # single normalised value per event
+            self.table = np.array([[v] for v in events.values()],
+                                  dtype=dtype).reshape(len(events), 1)
+
+        # environment is always passed into network in sorted order
+        self.keys = tuple(sorted(environment_keys))
+
+        # sizes of each section of an input row
+        self.slot_width = self.table.shape[1]
+        self.events_width = self.slot_width * (sequence_memory + 1)
+        self.width = self.events_width + len(self.keys)
+
+        # reusable buffer, grown when a larger batch is encoded
+        self.buffer = np.zeros((1, self.width), dtype=dtype)
+
+        # table rows of the remembered events, latest first
+        # kept in place and shifted along as events are pushed
+        self.window = np.full(sequence_memory, -1, dtype=int)
+
+    def lookup(self, event):
+        "Returns the table row for a given event"
+        try:
+            return self.index[event]
+        except KeyError:
+            if self.verbose_neurons:
+                # unknown events simply don't switch on any inputs
+                return len(self.index)
+            raise KeyError("%s is not a valid event" % event)
+
+    def indices(self, events):
+        "Returns the table rows for a list of events"
+        return np.array([self.lookup(e) for e in events], dtype=int)
+
+    def push(self, event):
+        "Shifts an event into the front of the encoded history window"
+        if self.sequence_memory:
+            self.window[1:] = self.window[:-1]
+            self.window[0] = self.lookup(event)
+
+    def reset_window(self, history=()):
+        "Rebuilds the encoded history window from a list of events"
+        self.window[:] = self.history_indices(history)
+
+    def history_indices(self, history=None):
+        """
+        Returns the table rows for the sequence memory, latest first.
+        Missing history (for the first few iterations) is returned as -1.
+        If no history is passed, the encoded window is used
+        """
+        if history is None:
+            return self.window
+        rows = np.empty(self.sequence_memory, dtype=int)
+        try:
+            length = len(history)
+            for i in range(self.sequence_memory):
+                rows[i] = self.lookup(history[-(i + 1)]) \
+                    if i < length else -1
+        except TypeError:
+            raise TypeError("history must be a list")
+        return rows
+
+    def environment_values(self, environment):
+        "Returns the environment as an array in the fixed key order"
+        # keys must match to ensure passed correctly in order
+        if len(environment) != len(self.keys):
+            raise KeyError("Passed environment must match staring env")
+        values = np.empty(len(self.keys), dtype=self.dtype)
+        for i, key in enumerate(self.keys):
+            try:
+                value = environment[key]
+            except KeyError:
+                raise KeyError("Passed environment must match staring env")
+            # written this way round so NaN is also rejected
+            if not value <= 1.0:
+                raise ValueError(
+                    "%s env var is %s exceeding maximum 1.0" % (key, value))
+            values[i] = value
+        return values
+
+    def rows(self, count):
+        "Returns a view of the reusable buffer with a given number of rows"
+        if count > len(self.buffer):
+            self.buffer = np.zeros((count, self.width), dtype=self.dtype)
+        return self.buffer[:count]
+
+    def slots(self, indices, windows):
+        """
+        Table rows for each memory slot (current event first) of a batch,
+        given as in encode_batch. Returns a (subjects x events x slots) array
+        """
+        subjects, events = indices.shape
+        slots = np.empty((subjects, events, self.sequence_memory + 1),
+                         dtype=int)
+        slots[..., 0] = indices
+        if self.sequence_memory:
+            slots[..., 1:] = np.asarray(windows)[:, None, :]
+            # if no historical events, use the provided event
+            # not particularly accurate but washes it's face
+            missing = slots < 0
+            if missing.any():
+                slots[missing] = np.broadcast_to(
+                    indices[..., None], slots.shape)[missing]
+        return slots
+
+    def encode_batch(self, indices, windows, values, out=None):
+        """
+        Encodes rows for a batch of subjects, each with their own
+        history window (subjects x memory) and environment values
+        (subjects x keys), for events given as table indices
+        (subjects x events). Returns a (subjects x events x width) array
+        """
+        indices = np.asarray(indices, dtype=int)
+        subjects, events = indices.shape
+        if out is None:
+            out = np.empty((subjects, events, self.width), dtype=self.dtype)
+
+        slots = self.slots(indices, windows)
+        out[..., :self.events_width] = self.table[slots].reshape(
+            subjects, events, self.events_width)
+        out[..., self.events_width:] = np.asarray(values)[:, None, :]
+        return out
+
+    def encode_many(self, indices, environment, history, out=None):
+        """
+        Encodes a row per event (given as table indices) all sharing
+        the same environment and history (None for the encoded window).
+        Writes into `out` if given, otherwise into the reusable buffer
+        which is overwritten on the next call.
+        """
+        indices = np.asarray(indices, dtype=int)
+        if out is None:
+            out = self.rows(len(indices))
+        self.encode_batch(indices[None],
+                          self.history_indices(history)[None],
+                          self.environment_values(environment)[None],
+                          out[None])
+        return out
+
+    def sparse_batch(self, indices, windows, values):
+        """
+        SparseRows for a single event per subject (given as table indices),
+        each with their own history window (subjects x memory)
+        and environment values (subjects x keys). Only for verbose neurons
+        """
+        if not self.verbose_neurons:
+            raise ValueError("Sparse inputs are only for verbose neurons")
+        slots = self.slots(np.asarray(indices, dtype=int)[:, None],
+                           windows)[:, 0]
+        # unknown events are the blank row, switching nothing on
+        columns = slots + np.arange(slots.shape[1]) * self.slot_width
+        columns[slots == len(self.index)] = -1
+        return SparseRows(columns, values, self.width)
+
+    def sparse_many(self, indices, environment, history):
+        """
+        Same as encode_many, but returns SparseRows of the input switched
+        on per memory slot, so the cost doesn't grow with the events.
+        Only for verbose neurons
+        """
+        indices = np.asarray(indices, dtype=int)
+        windows = np.broadcast_to(self.history_indices(history),
+                                  (len(indices), self.sequence_memory))
+        values = np.broadcast_to(self.environment_values(environment),
+                                 (len(indices), len(self.keys)))
+        return self.sparse_batch(indices, windows, values)
+
+    def encode(self, event, environment, history):
+        "Encodes a single event as a row, ready for the network"
+        return self.encode_many((self.lookup(event),), environment, history)
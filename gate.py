@@ -0,0 +1,150 @@
+"""
+Definitions of the learned helplessness experiment,
+see the README & test_gate
+"""
+from collections import OrderedDict
+
+from .pavlov import Respondant
+from .protocol import Phase, Protocol
+
+# ENVIRONMENT VARIABLES
+
+DANGER = 'in_danger'
+GATE = 'get_is_closed'
+
+# ACTIONS
+
+
+def rest(environment):
+    "Just sit and lie down to rest"
+    if environment[DANGER]:
+        # if in pain, return no enjoyment
+        return 0.1, environment
+    else:
+        # otherwise if resting, enjoys life
+        return 0.6, environment
+
+
+def run(environment):
+    "Escape from danger, in this case electric shock"
+    if environment[DANGER]:
+        # runs from danger
+        if environment[GATE]:
+            # get closed, can't get out of danger
+            return 0.01, environment
+        else:
+            # get open, can escape
+            environment[DANGER] = 0
+            # happy about escaping
+            return 0.5, environment
+    else:
+        # is just running for fun
+        return 0.1, environment
+
+
+def shock(environment):
+    "Now in immediate danger and hurting"
+    environment[DANGER] = 1
+    return 0.01, environment
+
+
+ACTIONS = [rest, run]
+STIMULI = [shock]
+
+# seed of the experiment's random numbers, so it's repeatable
+SEED = 0
+
+
+# helpers for environment conditions
+# used when building prediction scenarios below
+NORMAL = {DANGER: 0, GATE: 0}
+IN_DANGER_GATE_OPEN = {DANGER: 1, GATE: 0}
+IN_DANGER_GATE_CLOSED = {DANGER: 1, GATE: 1}
+
+# used for plotting predictions
+SCENARIOS = (
+    ('1. Rest - No danger', (rest, NORMAL)),
+    ('2. Run - No danger', (run, NORMAL)),
+    ('3. Rest - Danger, gate open', (rest, IN_DANGER_GATE_OPEN)),
+    ('4. Run - Danger, gate open', (run, IN_DANGER_GATE_OPEN)),
+    ('5. Rest - Danger, gate closed', (rest, IN_DANGER_GATE_CLOSED)),
+    ('6. Run - Danger, gate closed', (run, IN_DANGER_GATE_CLOSED)),
+)
+
+# decisions made after each phase of the experiment
+EXPECTED = OrderedDict([
+    # learns to rest under normal conditions
+    ('1. No danger', rest),
+    # learns to run when it's in danger (and gate open)
+    ('2. Danger, gate open', run),
+    # remembers to rest under normal conditions
+    ('2. No danger', rest),
+    # learns to rest when it's in danger
+    ('3. Danger, gate closed', rest),
+    # predicts to rest when get is open
+    ('3. Danger, gate open', rest),
+    # learnt to rest when gate closed still
+    ('4. Danger, gate closed', rest),
+    # learnt to rest when gate is open still
+    ('4. Danger, gate open', rest),
+])
+
+
+def helpless_subject(**kwargs):
+    "Respondant for the learned helplessness experiment"
+    return Respondant(
+        actions=ACTIONS,
+        stimuli=STIMULI,
+        environment={
+            DANGER: 0,
+            GATE: 0,
+        },
+        hidden_layers=6,
+        scenarios=dict(SCENARIOS),
+        **kwargs)
+
+
+# scenario keys
+SK = [r[0] for r in SCENARIOS]
+
+LEARNED_HELPLESSNESS = Protocol([
+    # learns that resting is the best when no danger
+    Phase(100, randomised=0.4, record=SK[0:2],
+          checks=[('1. No danger', NORMAL)]),
+    # then begin shock treatment with gate open
+    Phase(300, stimulus=shock, probability=0.4, randomised=0.4,
+          record=SK[2:4],
+          checks=[('2. Danger, gate open', IN_DANGER_GATE_OPEN),
+                  ('2. No danger', NORMAL)]),
+    # teach it learned helplessness
+    # close the gate, which cannot be opened by subject actions
+    Phase(200, stimulus=shock, probability=0.4, randomised=0.4,
+          environment={GATE: 1, DANGER: 1}, record=SK[4:6],
+          checks=[('3. Danger, gate closed', IN_DANGER_GATE_CLOSED),
+                  ('3. Danger, gate open', IN_DANGER_GATE_OPEN)]),
+    # finalise test with actual input
+    # by opening the gate
+    Phase(200, randomised=0.1, environment={GATE: 0, DANGER: 1},
+          record=SK[2:4],
+          checks=[('4. Danger, gate closed', IN_DANGER_GATE_CLOSED),
+                  ('4. Danger, gate open', IN_DANGER_GATE_OPEN)]),
+])
+
+
+def learned_helplessness(subject):
+    """
+    The key result we're looking for
+    is that the subject first learns to
+    * rest when not in danger
+    * to rest when in danger and can escape (gate is open)
+    * to rest when that danger is removed
+
+    This is the basis of "learned helplessness"
+
+    Returns the decisions made after each phase (see EXPECTED)
+
+    To test:
+    * Does this occur when remove artifical success
+        stimulus when escapes danger? (will need to add history)
+    """
+    return LEARNED_HELPLESSNESS.run(subject)
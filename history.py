@@ -0,0 +1,76 @@
+class History(object):
+    """
+    Fixed capacity ring buffer of the most recent events.
+
+    Only the last `capacity` events are kept in memory, the full
+    sequence can optionally be traced to a file (one event name per line)
+    for analysis after the experiment.
+    A trace opened from a path is owned by the history, and closed
+    by close, an open file passed in is only flushed.
+    """
+    def __init__(self, capacity, trace=None):
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.capacity = capacity
+        self.events = [None] * capacity
+        # position of the next event to be written
+        self.position = 0
+        self.length = 0
+        # count of every event seen, including forgotten ones
+        self.total = 0
+
+        # either a path to append to or an open file like object
+        self.owns_trace = not (trace is None or hasattr(trace, 'write'))
+        self.trace = open(trace, 'a') if self.owns_trace else trace
+
+    def append(self, event):
+        "Stores an event, forgetting the oldest if full"
+        self.events[self.position] = event
+        self.position = (self.position + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+        self.total += 1
+        if self.trace is not None:
+            self.trace.write("%s\n" % getattr(event, '__name__', event))
+
+    def flush(self):
+        "Writes any buffered lines of the trace to disk"
+        if self.trace is not None:
+            self.trace.flush()
+
+    def close(self):
+        "Closes the trace file if the history opened it, otherwise flushes it"
+        if self.trace is not None:
+            if self.owns_trace:
+                self.trace.close()
+            else:
+                self.trace.flush()
+            self.trace = None
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError("history index out of range")
+        oldest = self.position - self.length
+        return self.events[(oldest + i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (History, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return "History(%r)" % list(self)
@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from timeit import default_timer
+
+
+# phases of a step that are timed
+# backward is training, which runs a forward & backward pass per epoch
+PHASES = ('encode', 'forward', 'backward', 'event', 'predictions')
+
+
+class Stats(object):
+    """
+    Timings & counts of each phase of a Respondant's steps,
+    optionally with a trace of the time spent in each phase, per step.
+    Turned on with Respondant(instrument=True) or instrument=Stats(...)
+    """
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        "Clears everything recorded so far"
+        self.seconds = OrderedDict((phase, 0.0) for phase in PHASES)
+        self.counts = OrderedDict((phase, 0) for phase in PHASES)
+        self.steps = 0
+        # per step trace, of (step, event name, {phase: seconds})
+        self.step_trace = []
+        self.current = {}
+
+    def add(self, phase, seconds):
+        "Records a call of a phase taking some seconds"
+        self.seconds[phase] += seconds
+        self.counts[phase] += 1
+        if self.trace:
+            self.current[phase] = self.current.get(phase, 0.0) + seconds
+
+    def timed(self, phase, function, *args):
+        "Calls a function, recording the time taken as a phase"
+        start = default_timer()
+        try:
+            return function(*args)
+        finally:
+            self.add(phase, default_timer() - start)
+
+    def end_step(self, event):
+        "Marks the end of a step (called after learning from an event)"
+        if self.trace:
+            self.step_trace.append((self.steps, getattr(event, '__name__',
+                                                        str(event)),
+                                    self.current))
+            self.current = {}
+        self.steps += 1
+
+    def summary(self):
+        "Dict of phase to (count, total seconds, mean seconds)"
+        return OrderedDict(
+            (phase, (self.counts[phase], self.seconds[phase],
+                     self.seconds[phase] / self.counts[phase]
+                     if self.counts[phase] else 0.0))
+            for phase in PHASES)
+
+    def __str__(self):
+        lines = ['%d steps' % self.steps,
+                 '%-12s %8s %10s %10s' % ('phase', 'count', 'total s',
+                                          'mean ms')]
+        for phase, (count, seconds, mean) in self.summary().items():
+            lines.append('%-12s %8d %10.4f %10.4f' % (
+                phase, count, seconds, mean * 1000))
+        return '\n'.join(lines)
+
+
+class Timed(object):
+    """
+    Wraps an object (e.g. a network or encoder), recording calls of
+    some of its methods as phases, given a dict of method name to phase.
+    Anything else is passed straight through
+    """
+    def __init__(self, wrapped, stats, phases):
+        self.wrapped = wrapped
+        self.stats = stats
+        self.phases = phases
+
+    def __getattr__(self, name):
+        # only called for attributes not set in __init__
+        if name.startswith('__') or name in ('wrapped', 'phases', 'stats'):
+            raise AttributeError(name)
+        attribute = getattr(self.wrapped, name)
+        phase = self.phases.get(name)
+        if phase is None:
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = default_timer()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self.stats.add(phase, default_timer() - start)
+        return timed
@@ -1,14 +1,29 @@
 from collections import OrderedDict
-from neupy import algorithms
+from timeit import default_timer
+import copy
+import importlib
+import json
 import numpy as np
-import random
 
+from .cache import PredictionCache
+from .encoder import Encoder
+from .history import History
+from .instrument import Stats, Timed
+from .sinks import MemorySink, plot_predictions
 
-np.random.seed(0)
 
 EPOCHS = 200
 LAYERS = 2
 STEPS = 0.1
+# dtype of the numpy backend's inputs, weights & predictions
+DTYPE = np.float32
+# hooks which can be added, see Respondant.add_hook
+HOOKS = ('pre_learn', 'post_learn', 'pre_decide', 'post_decide')
+# methods timed as each phase, when instrumented
+ENCODE_PHASES = {'encode': 'encode', 'encode_many': 'encode',
+                 'encode_batch': 'encode', 'sparse_many': 'encode',
+                 'sparse_batch': 'encode'}
+NETWORK_PHASES = {'predict': 'forward', 'train': 'backward'}
 
 
 def normalised_dict_from_list(basic_list):
@@ -32,6 +47,41 @@ def normalised_dict_from_list(basic_list):
     return d
 
 
+def event_name(event):
+    "Name of an event (or any module level function) to find it again"
+    return "%s:%s" % (event.__module__,
+                      getattr(event, '__qualname__', event.__name__))
+
+
+def find_event(name, events=None):
+    """
+    Finds an event given its name (see event_name),
+    either from a list of events or by importing it
+    """
+    module, qualname = name.split(':')
+    # matched on the full name, or failing that just the function name
+    for event in events or ():
+        if event_name(event) == name:
+            return event
+    for event in events or ():
+        if event_name(event).split(':')[1] == qualname:
+            return event
+    try:
+        found = importlib.import_module(module)
+        for attr in qualname.split('.'):
+            found = getattr(found, attr)
+    except (ImportError, AttributeError):
+        raise ValueError("Cannot find %s, pass it in events" % name)
+    return found
+
+
+def snapshot_path(path):
+    "Path of a snapshot file, with the .npz suffix numpy saves it with"
+    if isinstance(path, str) and not path.endswith('.npz'):
+        return path + '.npz'
+    return path
+
+
 class Respondant(object):
     """
     A generic class for running experiments.
@@ -40,7 +90,13 @@ class Respondant(object):
                  actions=None, environment=None, stimuli=None,
                  sequence_memory=0, verbose_neurons=True,
                  hidden_layers=LAYERS, steps=STEPS,
-                 scenarios=None):
+                 scenarios=None, trace=None, replay=None,
+                 backend='numpy', seed=None, prediction_interval=1,
+                 sink=None, instrument=False, tolerance=0, patience=0,
+                 sparse=False, candidates=None, cache=0, dtype=None):
+        # own random numbers, so runs are reproducible & independent
+        self.rng = np.random.RandomState(seed)
+
         # turn the actions&stimuli into network friendly input [0:1]
         self.actions = tuple() if actions is None else tuple(actions)
         self.stimuli = tuple() if stimuli is None else tuple(stimuli)
@@ -56,166 +112,638 @@ class Respondant(object):
                                                   key=lambda k: k[0]))
 
         # store a sequence of events & actions
+        # only as many as can be remembered (but at least the last event)
+        # optionally tracing them all to a file
         if sequence_memory < 0 or type(sequence_memory) is not int:
             raise ValueError("Sequence_memory must be a postive real number")
         else:
             self.sequence_memory = sequence_memory
-            self.history = list()
+            self.history = History(max(sequence_memory, 1), trace)
 
-        # number of input neurons =
+        # compiled lookup tables & buffers for the network inputs
+        # 1 input per event, per history, and environment inputs
+        # or if not verbose, a single input per event & history
+        # all of the dtype, float32 by default for the numpy backend
+        # other backends are float64, unless given a dtype they can take
         self.verbose_neurons = verbose_neurons
-        if verbose_neurons:
-            # 1 input per event, per history, and environment inputs
-            inputs = len(self.events) * (self.sequence_memory + 1)\
-                + len(self.environment)
-        else:
-            # current event + historical events, and environment
-            inputs = 1 + self.sequence_memory + len(self.environment)
+        if dtype is None and backend == 'numpy':
+            dtype = DTYPE
+        self.dtype = np.dtype(dtype)
+        self.encoder = Encoder(self.events, self.environment.keys(),
+                               self.sequence_memory, verbose_neurons,
+                               self.dtype)
+        self.action_indices = self.encoder.indices(self.actions)
+        # optional filter picking the actions decide scores, a function
+        # taking (respondant, environment) returning a list of actions
+        # (or None for all) e.g. candidates.RecentBest
+        self.candidates = candidates
+        inputs = self.encoder.width
+
+        # optional experience replay (ReplayBuffer), to train in batches
+        self.replay = replay
+        if replay is not None and replay.rng is None:
+            replay.rng = self.rng
+
+        # generate network, backend is either a name e.g. 'numpy' or 'neupy'
+        # or a class taking the layers, step & rng, see backends.Network
+        self.hidden_layers = hidden_layers
+        self.steps = steps
+        self.backend = backend
+        # imported here, so importing pavlov stays cheap
+        from .backends import build_network
+        self.net = build_network(backend, (inputs, hidden_layers, 1), steps,
+                                 self.rng, dtype)
 
-        # generate network
-        self.net = algorithms.Backpropagation(
-            (inputs, hidden_layers, 1), step=steps,
-        )
+        # optionally pass the events to the network as the inputs switched on
+        # (encoder.SparseRows) so the cost doesn't grow with the events
+        # used by learn, predict & decide
+        self.sparse = sparse
+        if sparse and not verbose_neurons:
+            raise ValueError("Sparse inputs need verbose_neurons")
+        if sparse and not getattr(self.net, 'sparse', False):
+            raise ValueError("%s backend can't take sparse inputs" % backend)
+
+        # adaptive training, stopping before the epochs passed to learn
+        # once the error is within the tolerance, or stops improving
+        # for patience epochs, see backends.EarlyStop
+        self.tolerance = tolerance
+        self.patience = patience
+        # epochs used by the last call of learn
+        self.last_epochs = 0
+
+        # optional cache of predicted outcomes, for repeated decide & predict
+        # calls between training, either a size, True for the default size
+        # or a PredictionCache
+        # entries are for a version of the weights, bumped when trained
+        # (set_weights on the network directly should also bump it)
+        if isinstance(cache, bool):
+            cache = PredictionCache() if cache else None
+        elif isinstance(cache, int):
+            cache = PredictionCache(cache) if cache else None
+        self.cache = cache
+        self.weight_version = 0
+
+        # optional timings of each phase of a step, see instrument.Stats
+        # either True or a Stats e.g. Stats(trace=True) for a per step trace
+        self.stats = None
+        if instrument:
+            self.stats = Stats() if instrument is True else instrument
+            self.encoder = Timed(self.encoder, self.stats, ENCODE_PHASES)
+            self.net = Timed(self.net, self.stats, NETWORK_PHASES)
+        # functions called before & after learn and decide, see add_hook
+        self.hooks = dict((name, []) for name in HOOKS)
 
         # for storage and plotting
+        # stored predictions are written to a sink, in memory by default
+        # or e.g. a sinks.FileSink to stream them to disk
         self.scenarios = scenarios
+        self.prediction_interval = prediction_interval
+        self.sink = MemorySink() if sink is None else sink
         if scenarios:
-            scenes = [(k, []) for k in scenarios.keys()]
-            self.predictions = OrderedDict(sorted(scenes, key=lambda k: k[0]))
+            self.encode_scenarios()
+            self.sink.start(self.scenario_keys, self.dtype)
+            # only store every nth call of store_predictions
+            self.prediction_calls = 0
 
     def input_defaults(self, environment, history):
-        "Returns self values if None passed"
-        if history is None:
-            history = self.history
-
-        # then append environment inputs
+        """Returns self environment if None passed,
+        a history of None uses the encoded sequence memory"""
         if environment is None:
             environment = self.environment
-        else:
-            # ensure is ordered in the same way as self.env
-            environment = OrderedDict(sorted(environment.items(),
-                                             key=lambda k: k[0]))
-            # keys must match to ensure passed correctly in order
-            if environment.keys() != self.environment.keys():
-                raise KeyError(
-                    "Passed environment must match staring env")
-
         return environment, history
 
-    def input_data(self, event, environment=None, history=None):
-        "Given an event, returns the data normalised ready for the network"
-
+    def encode(self, event, environment=None, history=None):
+        """
+        Given an event, returns the normalised row as a numpy array.
+        The array is a reused buffer, so is only valid until the next call
+        """
         environment, history = self.input_defaults(environment, history)
+        return self.encoder.encode(event, environment, history)
 
-        if self.verbose_neurons:
-            data = []
-            # signal which event is "on" as input
-            for e in self.events:
-                data.append(1 if e == event else 0)
-            # do the same for memory
-            for i in range(self.sequence_memory):
-                try:
-                    historical_event = history[-(i + 1)]
-                # for the first few iterations where there is no history
-                # simply use the inputted event
-                except IndexError:
-                    historical_event = event
-                except TypeError:
-                    raise TypeError("history must be a list")
-                # then loop through and add that historical
-                for e in self.events:
-                    data.append(1 if e == historical_event else 0)
+    def input_data(self, event, environment=None, history=None):
+        "Given an event, returns the data normalised ready for the network"
+        # return as a single row event
+        return self.encode(event, environment, history).tolist()
 
+    def learn(self, event, epochs=EPOCHS):
+        """The act of learning from an event, including storing history.
+        With a replay buffer, the event is stored and the network is
+        trained on a batch (using the buffer's epochs) once one is due.
+        Returns the number of epochs trained, fewer if adaptive"""
+        for hook in self.hooks['pre_learn']:
+            hook(self, event)
+        if self.stats is None:
+            outcome, environment = event(self.environment.copy())
         else:
-            # takes the normalised action as minimum input
-            try:
-                data = [self.events[event]]
-            except KeyError:
-                raise KeyError("%s is not a valid event" % event)
-
-            # then append historical events
-            for i in range(self.sequence_memory):
-                try:
-                    item = self.events[history[-(i + 1)]]
-                # if no historical events, use the provided event
-                # not particularly accurate but washes it's face
-                except IndexError:
-                    item = data[0]
-                data.append(item)
-
-        # pass (ordered) into network
-        for key, value in environment.items():
-            if value <= 1.0:
-                data.append(value)
-            else:
-                raise ValueError(
-                    "%s env var is %s exceeding maximum 1.0" % (key, value))
+            outcome, environment = self.stats.timed(
+                'event', event, self.environment.copy())
 
-        # return as a single row event
-        return [data]
+        batch = self.training_batch(event, outcome, epochs)
+        self.last_epochs = 0 if batch is None else self.train(*batch)
+        return self.remember(event, outcome, environment)
 
-    def learn(self, event, epochs=EPOCHS):
-        "The act of learning from an event, including storing history."
-        input_environment = self.environment
-        outcome, output_environment = event(input_environment.copy())
+    async def alearn(self, event, epochs=EPOCHS, executor=None):
+        """
+        Same as learn, for use in an asyncio event loop.
+        The event can be a coroutine function e.g. calling a simulator,
+        and the network is trained in an executor (the loop's default
+        thread pool if None) so other respondants carry on meanwhile.
+        A respondant's own calls must still be awaited one at a time
+        """
+        # imported here, so importing pavlov stays cheap
+        import asyncio
+        import inspect
+        for hook in self.hooks['pre_learn']:
+            hook(self, event)
+        start = default_timer()
+        result = event(self.environment.copy())
+        if inspect.isawaitable(result):
+            result = await result
+        outcome, environment = result
+        if self.stats is not None:
+            self.stats.add('event', default_timer() - start)
+
+        batch = self.training_batch(event, outcome, epochs)
+        self.last_epochs = 0
+        if batch is not None:
+            inputs, outcomes, epochs = batch
+            # copied, as an encoded row is a reused buffer
+            if isinstance(inputs, np.ndarray):
+                inputs = inputs.copy()
+            self.last_epochs = await asyncio.get_running_loop(
+            ).run_in_executor(executor, self.train, inputs, outcomes, epochs)
+        return self.remember(event, outcome, environment)
 
-        self.net.train(
-            np.array(self.input_data(event, input_environment)),
-            np.array([outcome]),
-            epochs=epochs)
+    def training_batch(self, event, outcome, epochs):
+        """The inputs, outcomes & epochs to train on for an event,
+        before it changes the environment. None if a replay isn't due"""
+        inputs = self.network_inputs((self.encoder.lookup(event),))
+        if self.replay is None:
+            return inputs, np.array([outcome]), epochs
+        # replayed experience is held densely
+        self.replay.add(inputs.dense() if self.sparse else inputs, outcome)
+        if self.replay.due():
+            batch_inputs, batch_outcomes = self.replay.sample()
+            return batch_inputs, batch_outcomes, self.replay.epochs
+        return None
 
+    def remember(self, event, outcome, environment):
+        "Moves on after learning from an event, returning the epochs used"
         # update the environment based on event
-        self.environment = output_environment
+        self.environment = environment
         # store the event it's sequence memory
         self.history.append(event)
+        self.encoder.push(event)
+
+        if self.stats is not None:
+            self.stats.end_step(event)
+        for hook in self.hooks['post_learn']:
+            hook(self, event, outcome)
+        return self.last_epochs
+
+    def train(self, inputs, outcomes, epochs):
+        "Trains the network, adaptively if set, returning the epochs used"
+        if self.tolerance or self.patience:
+            epochs = self.net.train(inputs, outcomes, epochs,
+                                    tolerance=self.tolerance,
+                                    patience=self.patience)
+        else:
+            self.net.train(inputs, outcomes, epochs)
+        if epochs:
+            self.weight_version += 1
+        return epochs
+
+    def fit(self, transitions, epochs=1, batch_size=256, shuffle=True,
+            chunk_size=None):
+        """
+        Trains offline on recorded transitions, rather than learning from
+        events one at a time, see transitions.TransitionLog.
+        transitions is a path (see transitions.load_transitions), a dict of
+        arrays, or for more than one epoch of an iterable of chunks
+        (dicts of arrays), a function returning the iterable.
+
+        Each epoch the transitions are read a chunk at a time, encoded in
+        bulk and trained on in mini-batches of batch_size rows, a step of
+        the network each, so only a chunk is held in memory at once.
+        If shuffled, the rows are shuffled within each chunk,
+        as are the chunks of arrays. Returns the mini-batches trained on
+        """
+        # imported here, so importing pavlov stays cheap
+        from .transitions import CHUNK_SIZE, chunks
+        if epochs > 1 and not (callable(transitions) or
+                               isinstance(transitions, (str, dict)) or
+                               iter(transitions) is not transitions):
+            raise ValueError("Pass a function returning the chunks, "
+                             "to fit more than one epoch of them")
+        batches = 0
+        for epoch in range(epochs):
+            data = transitions() if callable(transitions) else transitions
+            for chunk in chunks(data, chunk_size or CHUNK_SIZE,
+                                self.rng if shuffle else None):
+                batches += self.fit_chunk(chunk, batch_size, shuffle)
+        if batches:
+            self.weight_version += 1
+        return batches
+
+    def fit_chunk(self, chunk, batch_size, shuffle=True):
+        "Trains on a chunk of transitions, returning the mini-batches used"
+        events = np.asarray(chunk['event'])
+        rows = len(events)
+        history = chunk['history']
+        environment = chunk['environment']
+        outcomes = chunk['outcome']
+        if np.shape(history) != (rows, self.sequence_memory) or \
+                np.shape(environment) != (rows, len(self.encoder.keys)):
+            raise ValueError("Transitions must match the history & "
+                             "environment of the respondant")
+        order = self.rng.permutation(rows) if shuffle else np.arange(rows)
+        batches = 0
+        for start in range(0, rows, batch_size):
+            # sorted, so memory mapped rows are read in order
+            batch = np.sort(order[start:start + batch_size])
+            values = np.asarray(environment[batch], dtype=self.dtype)
+            # written this way round so NaN is also rejected
+            if not (values <= 1.0).all():
+                raise ValueError("Transitions have env vars exceeding 1.0")
+            inputs = self.batch_inputs(events[batch], history[batch], values)
+            self.net.train(inputs, outcomes[batch], 1)
+            batches += 1
+        return batches
 
     def predict(self, event, environment=None, history=None):
         "Prediction of an outcome based on an event and environment"
         # predict based on given
-        raw_inputs = self.input_data(event, environment, history)
-        predicted = self.net.predict(raw_inputs)
-        # [0][0] to return just the predicted outcome, rather than the array
-        return predicted[0][0]
+        # [0] to return just the predicted outcome, rather than the array
+        return self.outcomes(np.array([self.encoder.lookup(event)]),
+                             environment, history)[0]
+
+    def outcomes(self, indices, environment=None, history=None):
+        """Predicted outcome of each event, given as encoder table rows.
+        Taken from the cache, if there is one & it's been predicted
+        since the network was last trained"""
+        if self.cache is None:
+            return np.ravel(self.net.predict(
+                self.network_inputs(indices, environment, history)))
+        environment, history = self.input_defaults(environment, history)
+        # the encoded state, which determines the network inputs
+        key = (indices.tobytes(),
+               self.encoder.environment_values(environment).tobytes(),
+               self.encoder.history_indices(history).tobytes())
+        outcomes = self.cache.get(key, self.weight_version)
+        if outcomes is None:
+            outcomes = np.ravel(self.net.predict(
+                self.network_inputs(indices, environment, history)))
+            self.cache.put(key, outcomes)
+        return outcomes
+
+    def network_inputs(self, indices, environment=None, history=None):
+        """Network inputs for events given as encoder table rows,
+        SparseRows if sparse, otherwise a dense (reused) buffer"""
+        environment, history = self.input_defaults(environment, history)
+        if self.sparse:
+            return self.encoder.sparse_many(indices, environment, history)
+        return self.encoder.encode_many(indices, environment, history)
+
+    def batch_inputs(self, indices, windows, values):
+        """Network inputs for a batch of events (as encoder table rows)
+        each with its own history window & environment values,
+        SparseRows if sparse, otherwise a dense (reused) buffer"""
+        if self.sparse:
+            return self.encoder.sparse_batch(indices, windows, values)
+        return self.encoder.encode_batch(
+            np.asarray(indices)[:, None], windows, values,
+            self.encoder.rows(len(indices))[:, None])[:, 0]
+
+    def input_matrix(self, events, environment=None, history=None,
+                     out=None):
+        "Stacks the input rows for several events into a single matrix"
+        environment, history = self.input_defaults(environment, history)
+        return self.encoder.encode_many(
+            self.encoder.indices(events), environment, history, out)
+
+    def choose(self, outcomes, randomised=0, actions=None, top_k=None):
+        """Picks the action with the best (optionally randomised) outcome,
+        given one predicted outcome per action (all of them by default).
+        With top_k, returns the best k as a list of (action, outcome)"""
+        actions = self.actions if actions is None else actions
+        if not actions:
+            return None if top_k is None else []
+        scores = outcomes + randomised * self.rng.random_sample(len(actions))
+        if top_k is None:
+            # argmax keeps the first of any equal outcomes
+            return actions[int(np.argmax(scores))]
+        # stable, so also keeps the first of any equal outcomes
+        best = np.argsort(-scores, kind='mergesort')[:top_k]
+        return [(actions[i], float(outcomes[i])) for i in best]
 
-    def decide(self, environment=None, randomised=0):
+    def decide(self, environment=None, randomised=0, top_k=None):
         """Work out which action is best to take,
-        based on the situation and events"""
-        best_action = None
-        best_outcome = 0
-        for action in self.actions:
-            # predict the outcome
-            outcome = self.predict(action, environment)
-            # if randomised decision making
-            outcome += randomised * random.random()
-            # take note of the best
-            if best_outcome < outcome or best_action is None:
-                best_action = action
-                best_outcome = outcome
-
-        # return the best action
-        return best_action
+        based on the situation and events.
+        With top_k, returns the best k actions with their predicted outcomes
+        as a list of (action, outcome), best first.
+        Only the candidate actions are scored, if a filter was given"""
+        for hook in self.hooks['pre_decide']:
+            hook(self, environment)
+        actions, indices = self.action_candidates(environment)
+        if not actions:
+            decision = None if top_k is None else []
+        else:
+            # score every action in a single pass through the network
+            decision = self.choose(self.outcomes(indices, environment),
+                                   randomised, actions, top_k)
+            if hasattr(self.candidates, 'update'):
+                self.candidates.update(
+                    self, environment, [decision] if top_k is None
+                    else [action for action, outcome in decision])
+        for hook in self.hooks['post_decide']:
+            hook(self, decision)
+        return decision
+
+    def action_candidates(self, environment=None):
+        """The actions to score in an environment, and their encoder rows.
+        All of them, unless the candidates filter picks some"""
+        if self.candidates is not None:
+            actions = self.candidates(self, environment)
+            if actions:
+                return tuple(actions), self.encoder.indices(actions)
+        return self.actions, self.action_indices
+
+    async def adecide(self, environment=None, randomised=0, top_k=None,
+                      executor=None):
+        """Same as decide, for use in an asyncio event loop,
+        scoring the actions in an executor (see alearn)"""
+        import asyncio
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.decide, environment, randomised, top_k)
+
+    def add_hook(self, name, hook):
+        """
+        Adds a function to call before or after learn or decide, named
+            pre_learn(respondant, event)
+            post_learn(respondant, event, outcome)
+            pre_decide(respondant, environment)
+            post_decide(respondant, decision)
+        """
+        if name not in self.hooks:
+            raise ValueError("%s is not a hook, must be one of %s" % (
+                name, ', '.join(HOOKS)))
+        self.hooks[name].append(hook)
+
+    def decide_many(self, environments, randomised=0):
+        """Same as decide but for a list of environments,
+        scoring every action in every environment in a single pass"""
+        if not self.actions:
+            return [None for environment in environments]
+        if not environments:
+            return []
+        # encode every environment into one matrix
+        count = len(self.actions)
+        matrix = np.empty((len(environments) * count, self.encoder.width),
+                          self.dtype)
+        for i, environment in enumerate(environments):
+            environment, history = self.input_defaults(environment, None)
+            self.encoder.encode_many(self.action_indices, environment,
+                                     history,
+                                     out=matrix[i * count:(i + 1) * count])
+        outcomes = np.ravel(self.net.predict(matrix))
+        # one row of outcomes per environment
+        outcomes = outcomes.reshape(len(environments), count)
+        return [self.choose(row, randomised) for row in outcomes]
+
+    def encode_scenarios(self):
+        """
+        Encodes the scenarios, once, into a matrix of a row per scenario
+        (in key order). So all of them can be predicted in one pass.
+        """
+        self.scenario_keys = tuple(sorted(self.scenarios))
+        self.scenario_inputs = np.zeros((len(self.scenario_keys),
+                                         self.encoder.width), self.dtype)
+        # scenarios without an environment or history use the current ones
+        # so are encoded again before each prediction
+        self.scenario_live = []
+        self.scenario_masks = {}
+        for i, key in enumerate(self.scenario_keys):
+            value = tuple(self.scenarios[key]) + (None, None)
+            self.input_matrix(value[:1], value[1], value[2],
+                              out=self.scenario_inputs[i:i + 1])
+            if value[1] is None or \
+                    (self.sequence_memory and value[2] is None):
+                self.scenario_live.append(i)
+
+    def predict_scenarios(self):
+        "Predicted outcome of every scenario, in key order"
+        for i in self.scenario_live:
+            key = self.scenario_keys[i]
+            value = tuple(self.scenarios[key]) + (None, None)
+            self.input_matrix(value[:1], value[1], value[2],
+                              out=self.scenario_inputs[i:i + 1])
+        return np.ravel(self.net.predict(self.scenario_inputs))
+
+    @property
+    def predictions(self):
+        "Stored predictions, as a (steps x scenarios) array"
+        return self.sink.predictions
 
     def store_predictions(self, keys=None):
         """
         Stores predictions given a set of scenarios.
         Can pass optional list of keys to only store for those values.
+        Each is written to the sink, with the step being the call number
         """
-        if self.scenarios:
-            for key, value in self.scenarios.items():
-                if keys is None or key in keys:
-                    self.predictions[key].append(self.predict(*value))
-                else:
-                    self.predictions[key].append(0.0)
-        else:
+        if not self.scenarios:
             raise ValueError("scenarios must be set at __init__")
 
-    def plot_predictions(self):
-        "Plots any predictions generated from calling decide"
+        self.prediction_calls += 1
+        if (self.prediction_calls - 1) % self.prediction_interval:
+            return
+
+        values = self.predict_scenarios()
+        mask = None
+        if keys is not None:
+            keys = tuple(keys)
+            if keys not in self.scenario_masks:
+                self.scenario_masks[keys] = np.array(
+                    [k in keys for k in self.scenario_keys], dtype=bool)
+            mask = self.scenario_masks[keys]
+        if self.stats is None:
+            self.sink.write(self.prediction_calls - 1, values, mask)
+        else:
+            self.stats.timed('predictions', self.sink.write,
+                             self.prediction_calls - 1, values, mask)
+
+    def plot_predictions(self, show=True):
+        """
+        Plots any predictions generated from calling decide,
+        against the step each was stored at.
+        Those streamed to a file are best plotted offline,
+        with sinks.plot_predictions
+        """
         import matplotlib.pyplot as plt
-        if self.scenarios:
-            for key, data in self.predictions.items():
-                plt.plot(data, label=key)
-            plt.axis([0, len(data), 0, 1])
+        if getattr(self.sink, 'path', None) is not None:
+            self.sink.flush()
+            plot_predictions(self.sink.path, show)
+        elif self.scenarios:
+            data, steps = self.predictions, self.sink.steps
+            for i, key in enumerate(self.scenario_keys):
+                plt.plot(steps, data[:, i], label=key)
+            plt.axis([0, steps[-1] + 1 if len(steps) else 1, 0, 1])
             plt.legend(loc=1)
             plt.grid(True)
-            plt.show()
+            if show:
+                plt.show()
+
+    def close(self):
+        """
+        Closes the trace of the history (if opened from a path, an open
+        file passed in is flushed & left for the caller to close)
+        and the sink, writing out anything buffered.
+        Also called when used as a context manager
+        """
+        self.history.close()
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def fork(self, seed=None):
+        """
+        Copy in memory, to branch experiments off from this point.
+        Carries on from a copy of the random state, unless given a seed.
+        Any trace of the history isn't carried over (it stays with, and is
+        closed by, this respondant) and predictions
+        stored from then on are held in memory
+        """
+        trace, self.history.trace = self.history.trace, None
+        sink, self.sink = self.sink, None
+        try:
+            forked = copy.deepcopy(self)
+        finally:
+            self.history.trace = trace
+            self.sink = sink
+        if isinstance(sink, MemorySink):
+            forked.sink = copy.deepcopy(sink)
+        else:
+            forked.sink = MemorySink()
+            if self.scenarios:
+                forked.sink.start(self.scenario_keys, self.dtype)
+        if seed is not None:
+            forked.rng.seed(seed)
+        return forked
+
+    def save(self, path):
+        """
+        Saves a snapshot to a numpy .npz file, of the network weights,
+        events, environment, history, random state & predictions.
+        The .npz suffix is added to the path if it's missing.
+        Events (and any backend class) are saved by name,
+        so must be module level functions.
+        Returns the path saved to
+        """
+        rng = self.rng.get_state()
+        config = {
+            'actions': [event_name(e) for e in self.actions],
+            'stimuli': [event_name(e) for e in self.stimuli],
+            'environment': dict(self.environment),
+            'sequence_memory': self.sequence_memory,
+            'verbose_neurons': self.verbose_neurons,
+            'hidden_layers': self.hidden_layers,
+            'steps': self.steps,
+            'sparse': self.sparse,
+            'dtype': self.dtype.name,
+            'backend': self.backend if isinstance(self.backend, str)
+            else event_name(self.backend),
+            'prediction_interval': self.prediction_interval,
+            'tolerance': self.tolerance,
+            'patience': self.patience,
+            'history': [event_name(e) for e in self.history],
+            'history_total': self.history.total,
+            'rng': [rng[0], rng[2], rng[3], rng[4]],
+            'scenarios': None,
+        }
+        arrays = {'rng_keys': rng[1]}
+        for i, weight in enumerate(self.net.get_weights()):
+            arrays['weight_%s' % i] = weight
+
+        if self.scenarios:
+            config['scenarios'] = [
+                [key, event_name(value[0])] + [
+                    None if v is None else
+                    dict(v) if isinstance(v, dict) else
+                    [event_name(e) for e in v] for v in value[1:]]
+                for key, value in sorted(self.scenarios.items())]
+            config['prediction_calls'] = self.prediction_calls
+            arrays['predictions'] = self.predictions
+            arrays['prediction_steps'] = self.sink.steps
+
+        # numpy numbers in the environment saved as plain python ones
+        config = json.dumps(config, default=lambda value: value.item())
+        path = snapshot_path(path)
+        np.savez(path, config=np.array(config), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path, events=None, **kwargs):
+        """
+        Loads a snapshot saved with save, from the same path given to save
+        (with or without the .npz suffix). Events are found by importing
+        them, or from a list of events if passed.
+        Any other keyword arguments are passed to __init__ e.g. replay
+        """
+        with np.load(snapshot_path(path), allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            arrays = dict((k, data[k]) for k in data.files)
+
+        def find(names):
+            return [find_event(name, events) for name in names]
+
+        scenarios = None
+        if config['scenarios']:
+            scenarios = {}
+            for scenario in config['scenarios']:
+                value = [find_event(scenario[1], events)]
+                for v in scenario[2:]:
+                    value.append(find(v) if isinstance(v, list) else v)
+                scenarios[scenario[0]] = tuple(value)
+
+        backend = config['backend']
+        if ':' in backend:
+            backend = find_event(backend)
+
+        subject = cls(
+            actions=find(config['actions']),
+            stimuli=find(config['stimuli']),
+            environment=config['environment'],
+            sequence_memory=config['sequence_memory'],
+            verbose_neurons=config['verbose_neurons'],
+            hidden_layers=config['hidden_layers'],
+            steps=config['steps'],
+            sparse=config.get('sparse', False),
+            dtype=config.get('dtype'),
+            backend=backend,
+            prediction_interval=config['prediction_interval'],
+            tolerance=config.get('tolerance', 0),
+            patience=config.get('patience', 0),
+            scenarios=scenarios, **kwargs)
+
+        layers = len([k for k in arrays if k.startswith('weight_')])
+        subject.net.set_weights([arrays['weight_%s' % i]
+                                 for i in range(layers)])
+        for event in find(config['history']):
+            subject.history.append(event)
+            subject.encoder.push(event)
+        subject.history.total = config['history_total']
+
+        name, pos, has_gauss, cached = config['rng']
+        subject.rng.set_state(
+            (name, arrays['rng_keys'], pos, has_gauss, cached))
+
+        if scenarios:
+            for step, values in zip(arrays['prediction_steps'],
+                                    arrays['predictions']):
+                subject.sink.write(step, values)
+            subject.prediction_calls = config['prediction_calls']
+
+        return subject
@@ -0,0 +1,169 @@
+from collections import OrderedDict
+import copy
+import numpy as np
+
+from .pavlov import EPOCHS
+
+
+class Phase(object):
+    """
+    A phase of an experiment protocol, declared rather than written as
+    a loop. At the start of the phase the environment is updated with
+    any overrides, then for each of the steps the stimulus happens with
+    the given probability, otherwise the respondant decides what to do
+    (randomised by the exploration noise) and learns from it.
+
+    record is a list of the scenario keys to store predictions for
+    after every step, skipped for respondants without scenarios
+    (and cohorts, which have none). checks is an ordered list of
+    (name, environment) to decide in once the phase is over,
+    giving the protocol's results
+    """
+    def __init__(self, steps, stimulus=None, probability=0, randomised=0,
+                 environment=None, record=None, checks=(), epochs=EPOCHS):
+        if steps < 0:
+            raise ValueError("A phase can't have negative steps")
+        if probability and stimulus is None:
+            raise ValueError("A stimulus is needed for its probability")
+        self.steps = steps
+        self.stimulus = stimulus
+        self.probability = probability
+        self.randomised = randomised
+        self.environment = dict(environment or {})
+        self.record = None if record is None else tuple(record)
+        self.checks = tuple(checks)
+        self.epochs = epochs
+
+    def draws(self, rng, size=None):
+        """
+        Random numbers deciding if the stimulus happens each step,
+        drawn for the whole phase up front (steps x size, if given)
+        """
+        if not self.probability:
+            return None
+        shape = self.steps if size is None else (self.steps, size)
+        return rng.random_sample(shape)
+
+
+class Protocol(object):
+    """
+    An experiment as a list of phases, see Phase,
+    which can be run on a single Respondant, a Cohort
+    or a population of respondants over processes.
+    Runs return the decisions of the checks, by name
+    """
+    def __init__(self, phases):
+        self.phases = list(phases)
+        names = [name for phase in self.phases for name, env in phase.checks]
+        if len(set(names)) != len(names):
+            raise ValueError("Every check must have a unique name")
+
+    def __call__(self, subject):
+        return self.run(subject)
+
+    @property
+    def total_steps(self):
+        "Steps of every phase"
+        return sum(phase.steps for phase in self.phases)
+
+    def run(self, subject):
+        "Runs the protocol for a single Respondant"
+        return ProtocolRun(self, subject).advance()
+
+    def run_cohort(self, cohort):
+        """
+        Runs the protocol for every member of a Cohort together,
+        returning a list of decisions per check.
+        Cohorts have no scenarios, so like a respondant without any,
+        predictions aren't recorded
+        """
+        results = OrderedDict()
+        for phase in self.phases:
+            cohort.update_environment(phase.environment)
+            draws = phase.draws(cohort.rng, cohort.size)
+            for i in range(phase.steps):
+                if draws is None:
+                    events = cohort.decide(randomised=phase.randomised)
+                else:
+                    # as for a single respondant, only the members
+                    # the stimulus misses decide what to do
+                    hit = draws[i] < phase.probability
+                    events = cohort.decide(randomised=phase.randomised,
+                                           members=np.flatnonzero(~hit))
+                    events = [phase.stimulus if h else event
+                              for h, event in zip(hit, events)]
+                cohort.learn(events, phase.epochs)
+            for name, environment in phase.checks:
+                results[name] = cohort.decide(environment)
+        return results
+
+    def run_population(self, base=None, configs=None, seeds=(0,),
+                       processes=None):
+        """
+        Runs the protocol for every combination of config & seed,
+        over a pool of processes, see runner.run_population.
+        Events must be module level functions, to be sent to the processes
+        """
+        from .runner import run_population
+        return run_population(self, base, configs, seeds, processes)
+
+
+class ProtocolRun(object):
+    """
+    A protocol being run on a single Respondant, a number of steps
+    at a time, so it can be paused & carried on later e.g. by a sweep.
+    Passing randomised overrides the exploration of every phase
+    which has any
+    """
+    def __init__(self, protocol, subject, randomised=None):
+        self.protocol = protocol
+        self.subject = subject
+        self.randomised = randomised
+        # position of the next step
+        self.phase = 0
+        self.step = 0
+        self.steps = 0
+        self.draws = None
+        self.results = OrderedDict()
+
+    @property
+    def done(self):
+        return self.phase >= len(self.protocol.phases)
+
+    def advance(self, steps=None):
+        """Runs up to the given number of steps (or to the end),
+        returning the results of the checks so far"""
+        subject = self.subject
+        end = self.steps + steps if steps is not None else None
+        while not self.done and (end is None or self.steps < end):
+            phase = self.protocol.phases[self.phase]
+            if self.step == 0:
+                subject.environment.update(phase.environment)
+                self.draws = phase.draws(subject.rng)
+            randomised = phase.randomised
+            if self.randomised is not None and randomised:
+                randomised = self.randomised
+            if self.step < phase.steps:
+                if self.draws is not None and \
+                        self.draws[self.step] < phase.probability:
+                    event = phase.stimulus
+                else:
+                    event = subject.decide(randomised=randomised)
+                subject.learn(event, phase.epochs)
+                if phase.record is not None and subject.scenarios:
+                    subject.store_predictions(phase.record)
+                self.step += 1
+                self.steps += 1
+            if self.step == phase.steps:
+                for name, environment in phase.checks:
+                    self.results[name] = subject.decide(environment)
+                self.phase += 1
+                self.step = 0
+        return self.results
+
+    def fork(self, seed=None):
+        "Snapshot of the run, carrying on from the same point, see fork"
+        forked = copy.copy(self)
+        forked.subject = self.subject.fork(seed)
+        forked.results = self.results.copy()
+        return forked
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class ReplayBuffer(object):
+    """
+    Experience replay for a Respondant.
+
+    Rather than training on every single event as it happens,
+    (input, outcome) transitions are collected and the network
+    is trained on a mini-batch of them every `train_every` events.
+
+    Each batch holds every transition since the last training,
+    topped up with transitions sampled at random from the buffer.
+    """
+    def __init__(self, capacity=1000, batch_size=32, train_every=10,
+                 epochs=20, rng=None):
+        if capacity < 1 or batch_size < 1 or train_every < 1:
+            raise ValueError(
+                "capacity, batch_size & train_every must be at least 1")
+        if train_every > batch_size:
+            raise ValueError("train_every must not exceed batch_size")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.train_every = train_every
+        self.epochs = epochs
+        # if not given, a Respondant will share its own
+        self.rng = rng
+
+        # allocated on the first transition, once the width
+        # & dtype (that of the inputs, at least float32) are known
+        self.inputs = None
+        self.outcomes = None
+        self.position = 0
+        self.length = 0
+        # transitions added since the last batch
+        self.pending = 0
+
+    def __len__(self):
+        return self.length
+
+    def add(self, inputs, outcome):
+        "Stores a transition, overwriting the oldest if full"
+        inputs = np.ravel(inputs)
+        if self.inputs is None:
+            dtype = np.result_type(inputs.dtype, np.float32)
+            self.inputs = np.zeros((self.capacity, len(inputs)), dtype=dtype)
+            self.outcomes = np.zeros((self.capacity, 1), dtype=dtype)
+        self.inputs[self.position] = inputs
+        self.outcomes[self.position] = outcome
+        self.position = (self.position + 1) % self.capacity
+        self.length = min(self.length + 1, self.capacity)
+        self.pending += 1
+
+    def due(self):
+        "Whether enough transitions have arrived to train on a batch"
+        return self.pending >= self.train_every
+
+    def sample(self):
+        "Returns a batch of (inputs, outcomes) to train on"
+        pending = min(self.pending, self.length, self.batch_size)
+        # the most recent transitions, which haven't been trained on yet
+        recent = (self.position - 1 - np.arange(pending)) % self.capacity
+        # topped up at random from the older transitions
+        older = self.length - pending
+        extra = min(self.batch_size - pending, older)
+        if extra:
+            rng = np.random if self.rng is None else self.rng
+            picked = rng.choice(older, extra, replace=False)
+            picked = (self.position - 1 - pending - picked) % self.capacity
+            recent = np.concatenate([recent, picked])
+        self.pending = 0
+        return self.inputs[recent], self.outcomes[recent]
@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import itertools
+import multiprocessing
+
+from .pavlov import EPOCHS, Respondant
+
+
+def grid(**options):
+    """
+    Every combination of the given options, as a list of config dicts
+    e.g. grid(hidden_layers=[3, 6], steps=[0.1]) gives
+    [{'hidden_layers': 3, 'steps': 0.1}, {'hidden_layers': 6, 'steps': 0.1}]
+    """
+    keys = sorted(options)
+    return [dict(zip(keys, values))
+            for values in itertools.product(*(options[k] for k in keys))]
+
+
+def name_of(value):
+    "Events are reported by name, so results can be passed between processes"
+    return getattr(value, '__name__', value)
+
+
+def run_one(task):
+    "Runs a protocol for a single respondant, returning its result row"
+    protocol, base, config, seed = task
+    kwargs = dict(base)
+    kwargs.update(config)
+    subject = Respondant(seed=seed, **kwargs)
+    decisions = protocol(subject) or {}
+
+    row = OrderedDict([('seed', seed)])
+    for key in sorted(config):
+        row[key] = config[key]
+    for key, value in decisions.items():
+        row[key] = name_of(value)
+    row['predictions'] = getattr(subject, 'predictions', None)
+    return row
+
+
+def run_population(protocol, base=None, configs=None, seeds=(0,),
+                   processes=None):
+    """
+    Runs a protocol for every combination of config & seed,
+    fanned out over a pool of processes.
+
+    protocol is a (module level) function which is passed a Respondant,
+    drives it through an experiment and returns a dict of its decisions.
+    base holds the Respondant arguments shared by every run
+    (actions, stimuli, environment...), each of the configs
+    (see grid) overrides them.
+
+    Returns a row per run, holding the seed, config, decisions
+    (events given by name) & predictions.
+    Passing processes=1 runs everything in this process.
+    """
+    base = base or {}
+    configs = configs or [{}]
+    tasks = [(protocol, base, config, seed)
+             for config in configs for seed in seeds]
+
+    if processes == 1:
+        return [run_one(task) for task in tasks]
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(run_one, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+async def run_steps(subject, steps, randomised=0, stimulus=None,
+                    probability=0, epochs=EPOCHS):
+    """
+    Async experiment loop, each step the subject decides what to do
+    and learns from it. Unless (with the given probability)
+    the stimulus happens to it instead. Returns the events learnt from
+    """
+    events = []
+    for i in range(steps):
+        if stimulus is not None and subject.rng.random_sample() < probability:
+            event = stimulus
+        else:
+            event = await subject.adecide(randomised=randomised)
+        await subject.alearn(event, epochs)
+        events.append(event)
+    return events
+
+
+def run_concurrently(protocol, subjects, threads=None):
+    """
+    Runs an async protocol (a coroutine function passed a Respondant
+    e.g. using run_steps) for every subject in a single event loop,
+    so they all wait on their (async) events at the same time.
+    Networks are trained & predict in a pool of threads meanwhile,
+    numpy releasing the GIL for the heavy lifting.
+    Returns the result of each protocol, in order
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    async def gather():
+        asyncio.get_running_loop().set_default_executor(executor)
+        return await asyncio.gather(*[protocol(s) for s in subjects])
+
+    with ThreadPoolExecutor(threads) as executor:
+        return asyncio.run(gather())
@@ -0,0 +1,400 @@
+from concurrent.futures import Future
+from timeit import default_timer
+import collections
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from .backends import NumpyNetwork
+from .pavlov import Respondant
+
+
+# the header of the store, as int64s
+VERSION, WRITING = 0, 1
+HEADER = 4
+# files of a store's directory
+LAYOUT = 'layout.json'
+BLOCK = 'weights.bin'
+SNAPSHOT = 'respondant.npz'
+# latencies of the most recent requests kept by a server
+LATENCIES = 10000
+
+
+class WeightStore(object):
+    """
+    The network weights & encoder table of a trained respondant,
+    held in a memory mapped file so that any number of reader processes
+    can serve from them without their own copy, see Replica.
+
+    The weights are held twice. A single trainer process publishes a new
+    version by writing the copy not being read, then bumping the version
+    to switch readers over to it, so they never see half written weights.
+    Readers check the copy they used wasn't overwritten during a read
+    (by the version after next being written) and if it was, read again
+    """
+    def __init__(self, path, writable=False):
+        self.path = path
+        with open(os.path.join(path, LAYOUT)) as f:
+            layout = json.load(f)
+        self.dtype = np.dtype(layout['dtype'])
+        self.writable = writable
+        self.block = np.memmap(os.path.join(path, BLOCK), dtype=np.uint8,
+                               mode='r+' if writable else 'r')
+
+        def view(dtype, shape, offset):
+            count = int(np.prod(shape))
+            array = np.frombuffer(self.block, dtype, count, offset)
+            return array.reshape(shape), offset + array.nbytes
+
+        self.header, offset = view(np.int64, (HEADER,), 0)
+        self.table, offset = view(self.dtype, layout['table'], offset)
+        self.slots = []
+        for slot in range(2):
+            weights = []
+            for shape in layout['weights']:
+                weight, offset = view(self.dtype, shape, offset)
+                weights.append(weight)
+            self.slots.append(weights)
+
+    @classmethod
+    def create(cls, path, respondant):
+        """
+        Creates a store of a respondant, publishing its current weights.
+        Its events are saved by name (see Respondant.save)
+        so must be module level functions
+        """
+        weights = respondant.net.get_weights()
+        if not os.path.exists(path):
+            os.makedirs(path)
+        respondant.save(os.path.join(path, SNAPSHOT))
+        dtype = respondant.dtype
+        layout = {'dtype': dtype.name,
+                  'table': list(respondant.encoder.table.shape),
+                  'weights': [list(w.shape) for w in weights]}
+        with open(os.path.join(path, LAYOUT), 'w') as f:
+            json.dump(layout, f)
+        size = HEADER * 8 + dtype.itemsize * (
+            respondant.encoder.table.size + 2 * sum(w.size for w in weights))
+        with open(os.path.join(path, BLOCK), 'wb') as f:
+            f.truncate(size)
+
+        store = cls(path, writable=True)
+        store.table[:] = respondant.encoder.table
+        store.publish(respondant)
+        return store
+
+    @property
+    def version(self):
+        "The version of the weights published, 0 if none yet"
+        return int(self.header[VERSION])
+
+    def weights(self, version=None):
+        "The weights of a version (the latest by default) as read only views"
+        version = self.version if version is None else version
+        return self.slots[version % 2]
+
+    def overwritten(self, version):
+        "If the weights read as a version may have been written over since"
+        return self.header[WRITING] >= version + 2
+
+    def publish(self, weights):
+        """
+        Publishes new weights (or a respondant's), returning their version.
+        Only a single process can publish to a store
+        """
+        if not self.writable:
+            raise ValueError("Store must be opened writable to publish")
+        if isinstance(weights, Respondant):
+            weights = weights.net.get_weights()
+        version = self.version + 1
+        slot = self.slots[version % 2]
+        if [w.shape for w in slot] != [np.shape(w) for w in weights]:
+            raise ValueError("Weights must match the network layers")
+        self.header[WRITING] = version
+        for current, new in zip(slot, weights):
+            current[:] = new
+        self.header[VERSION] = version
+        return version
+
+
+class Replica(object):
+    """
+    A respondant serving decide & predict from a WeightStore, e.g. one
+    per worker process. Its network & encoder table are views of the
+    store, so it picks up newly published versions without restarting.
+    Requests are stateless, so pass the history of events if it's used
+    """
+    def __init__(self, store, events=None):
+        if isinstance(store, str):
+            store = WeightStore(store)
+        self.store = store
+        self.subject = Respondant.load(os.path.join(store.path, SNAPSHOT),
+                                       events)
+        if not isinstance(self.subject.net, NumpyNetwork):
+            raise ValueError("Only the numpy backend can serve from a store")
+        self.subject.encoder.table = store.table
+        self.version = None
+        self.refresh()
+
+    def refresh(self):
+        "Switches to the latest version of the weights, if it's changed"
+        version = self.store.version
+        if version != self.version:
+            self.subject.net.weights = self.store.weights(version)
+            # so any cached predictions are of the new version
+            self.subject.weight_version = version
+            self.version = version
+        return version
+
+    def read(self, function, *args):
+        "Calls a function of the latest weights, again if overwritten"
+        while True:
+            version = self.refresh()
+            result = function(*args)
+            if not self.store.overwritten(version):
+                return result
+
+    def outcomes(self, events, environment=None, history=()):
+        "Predicted outcome of each event"
+        indices = self.subject.encoder.indices(events)
+        return self.read(self.subject.outcomes, indices, environment,
+                         history).copy()
+
+    def predict(self, event, environment=None, history=()):
+        "Prediction of an outcome based on an event and environment"
+        return self.outcomes([event], environment, history)[0]
+
+    def decide(self, environment=None, randomised=0, top_k=None,
+               history=()):
+        "The best action to take, see Respondant.decide"
+        subject = self.subject
+        outcomes = self.outcomes(subject.actions, environment, history)
+        return subject.choose(outcomes, randomised, top_k=top_k)
+
+
+class Request(object):
+    "A request queued by a DecideServer, answered through its future"
+    def __init__(self, event, environment, history, randomised=0,
+                 top_k=None):
+        # event is None to decide, otherwise the event to predict
+        self.event = event
+        self.environment = environment
+        self.history = history
+        self.randomised = randomised
+        self.top_k = top_k
+        self.future = Future()
+        self.submitted = default_timer()
+
+
+class DecideServer(object):
+    """
+    Serves decide & predict requests for a Respondant (or a Replica)
+    from a queue, coalescing them into batches so every request in a batch
+    is scored in a single pass through the network.
+
+    A batch is passed on once it holds batch_size requests, or max_delay
+    seconds after its first request was submitted, trading latency
+    for throughput. Requests can come from any thread, and are answered
+    through futures. The latencies & throughput are kept, see metrics.
+    Only the server should use the respondant while it's running
+    """
+    def __init__(self, subject, batch_size=64, max_delay=0.002,
+                 latencies=LATENCIES):
+        if batch_size < 1:
+            raise ValueError("Batches must hold at least 1 request")
+        self.replica = subject if isinstance(subject, Replica) else None
+        self.subject = subject.subject if self.replica else subject
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.queue = queue.Queue()
+        self.thread = None
+        # latency of the most recent requests
+        self.latencies = collections.deque(maxlen=latencies)
+        self.reset_metrics()
+
+    def start(self):
+        "Starts serving the queue, in a background thread"
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.serve)
+            self.thread.daemon = True
+            self.thread.start()
+        return self
+
+    def stop(self):
+        "Stops serving, once every request already queued is answered"
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, environment=None, history=None, randomised=0,
+               top_k=None):
+        """
+        Queues a decide request, returning a future of the decision.
+        A history of None uses the respondant's own sequence memory
+        """
+        request = Request(None, environment, history, randomised, top_k)
+        self.queue.put(request)
+        return request.future
+
+    def submit_predict(self, event, environment=None, history=None):
+        "Queues a predict request, returning a future of the outcome"
+        request = Request(event, environment, history)
+        self.queue.put(request)
+        return request.future
+
+    def decide(self, environment=None, randomised=0, top_k=None,
+               history=None):
+        "Decides through the queue, see Respondant.decide"
+        return self.submit(environment, history, randomised,
+                           top_k).result()
+
+    def predict(self, event, environment=None, history=None):
+        "Predicts through the queue, see Respondant.predict"
+        return self.submit_predict(event, environment, history).result()
+
+    def serve(self):
+        "Takes batches from the queue until stopped"
+        stopping = False
+        while not stopping:
+            request = self.queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = request.submitted + self.max_delay
+            while len(batch) < self.batch_size:
+                try:
+                    request = self.queue.get(
+                        timeout=max(deadline - default_timer(), 0))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+            self.process(batch)
+
+    def process(self, batch):
+        "Answers a batch of requests, in a single pass through the network"
+        subject = self.subject
+        encoder = subject.encoder
+        indices, windows, values, answered = [], [], [], []
+        for request in batch:
+            try:
+                if request.event is None:
+                    rows = subject.action_indices
+                else:
+                    rows = [encoder.lookup(request.event)]
+                window = encoder.history_indices(request.history)
+                value = encoder.environment_values(
+                    subject.environment if request.environment is None
+                    else request.environment)
+            except (KeyError, TypeError, ValueError) as e:
+                request.future.set_exception(e)
+                continue
+            indices.extend(rows)
+            windows.extend([window] * len(rows))
+            values.extend([value] * len(rows))
+            answered.append((request, len(rows)))
+
+        if answered:
+            shape = (len(indices), -1)
+            args = (np.array(indices), np.array(windows).reshape(shape),
+                    np.array(values, dtype=subject.dtype).reshape(shape))
+            try:
+                if self.replica is None:
+                    outcomes = self.forward(*args)
+                else:
+                    outcomes = self.replica.read(self.forward, *args)
+            except Exception as e:
+                for request, rows in answered:
+                    request.future.set_exception(e)
+                answered = []
+
+        start = 0
+        for request, rows in answered:
+            scores = outcomes[start:start + rows]
+            start += rows
+            if request.event is None:
+                request.future.set_result(subject.choose(
+                    scores, request.randomised, top_k=request.top_k))
+            else:
+                request.future.set_result(float(scores[0]))
+        done = default_timer()
+        for request in batch:
+            self.latencies.append(done - request.submitted)
+        self.requests += len(batch)
+        self.batches += 1
+        if self.first is None:
+            self.first = min(request.submitted for request in batch)
+        self.last = done
+
+    def forward(self, indices, windows, values):
+        "Predicted outcome of every row of a batch"
+        return np.ravel(self.subject.net.predict(
+            self.subject.batch_inputs(indices, windows, values))).copy()
+
+    def reset_metrics(self):
+        self.latencies.clear()
+        self.requests = 0
+        self.batches = 0
+        self.first = None
+        self.last = None
+
+    def metrics(self):
+        """
+        Dict of the requests & batches served, mean batch size,
+        throughput (requests per second, from the first submitted
+        to the last answered) & the p50 and p99 latencies in seconds
+        """
+        latencies = np.array(self.latencies)
+        elapsed = self.last - self.first if self.requests else 0.0
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'batch_size': float(self.requests) / self.batches
+            if self.batches else 0.0,
+            'throughput': self.requests / elapsed if elapsed else 0.0,
+            'p50': float(np.percentile(latencies, 50))
+            if len(latencies) else 0.0,
+            'p99': float(np.percentile(latencies, 99))
+            if len(latencies) else 0.0,
+        }
+
+
+def synthetic_load(server, environments, requests=1000, rate=None,
+                   histories=None, seed=None):
+    """
+    Load generator, submitting decide requests to a running server for
+    environments picked at random from a list, with the history
+    at the same position of histories if given.
+    They're submitted at rate per second (with random arrival times)
+    or otherwise all at once. Waits for every decision,
+    returning the server's metrics
+    """
+    rng = np.random.RandomState(seed)
+    gaps = rng.exponential(1.0 / rate, requests) if rate \
+        else np.zeros(requests)
+    picks = rng.randint(len(environments), size=requests)
+    futures = []
+    when = default_timer()
+    for gap, pick in zip(gaps, picks):
+        when += gap
+        delay = when - default_timer()
+        if delay > 0:
+            time.sleep(delay)
+        futures.append(server.submit(
+            environments[pick],
+            None if histories is None else histories[pick]))
+    for future in futures:
+        future.result()
+    return server.metrics()
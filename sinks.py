@@ -0,0 +1,191 @@
+import json
+import os
+import numpy as np
+
+
+# initial number of rows to hold in memory
+PREDICTION_ROWS = 1024
+# columns of the file sink, with their types
+# values are of the dtype the sink is started with
+COLUMNS = (
+    ('step', np.int64),
+    ('scenario', np.int32),
+    ('value', None),
+)
+
+
+class MemorySink(object):
+    """
+    Holds stored predictions in memory,
+    as a (steps x scenarios) array grown as needed.
+    Scenarios not being stored for a step are held as 0.0
+    """
+    def __init__(self, rows=None):
+        self.rows = PREDICTION_ROWS if rows is None else rows
+        self.keys = ()
+
+    def start(self, keys, dtype=float):
+        """Called with the scenario keys & dtype of the predictions,
+        before any are written"""
+        self.keys = tuple(keys)
+        self.log = np.zeros((self.rows, len(self.keys)), dtype=dtype)
+        self.step_log = np.zeros(self.rows, dtype=np.int64)
+        self.count = 0
+
+    def write(self, step, values, mask=None):
+        """
+        Stores a step's prediction for every scenario,
+        mask optionally selects which are stored (the rest are 0.0)
+        """
+        # double the log when it's full
+        if self.count == len(self.log):
+            self.log = np.vstack([self.log, np.zeros_like(self.log)])
+            self.step_log = np.concatenate([self.step_log,
+                                            np.zeros_like(self.step_log)])
+        row = self.log[self.count]
+        if mask is None:
+            row[:] = values
+        else:
+            row[:] = 0.0
+            row[mask] = values[mask]
+        self.step_log[self.count] = step
+        self.count += 1
+
+    @property
+    def predictions(self):
+        "Stored predictions, as a (steps x scenarios) array"
+        return self.log[:self.count]
+
+    @property
+    def steps(self):
+        "Step of each stored row of predictions"
+        return self.step_log[:self.count]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileSink(object):
+    """
+    Streams stored predictions to disk, as (step, scenario, value) rows.
+
+    The path is a directory holding meta.json (the keys & dtype of the
+    values) and a raw append only file per column,
+    step.bin, scenario.bin & value.bin.
+    Rows are collected into chunks in memory, then appended to the files
+    when a chunk is full (and on flush or close).
+    Only the scenarios being stored are written, see read_predictions
+    """
+    def __init__(self, path, chunk_size=4096):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.keys = ()
+
+    def start(self, keys, dtype=float):
+        """Called with the scenario keys & dtype of the predictions,
+        before any are written"""
+        self.keys = tuple(keys)
+        meta = {'keys': list(self.keys), 'dtype': np.dtype(dtype).name}
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        meta_path = os.path.join(self.path, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                if json.load(f) != meta:
+                    raise ValueError(
+                        "%s holds predictions for other scenarios" % self.path)
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+        self.chunk = dict((name, np.empty(self.chunk_size,
+                                          dtype=column or dtype))
+                          for name, column in COLUMNS)
+        self.count = 0
+
+    def write(self, step, values, mask=None):
+        """
+        Writes a step's prediction for every scenario,
+        or if given a mask, only those selected
+        """
+        scenarios = np.arange(len(values)) if mask is None \
+            else np.flatnonzero(mask)
+        for scenario in scenarios:
+            if self.count == self.chunk_size:
+                self.flush()
+            self.chunk['step'][self.count] = step
+            self.chunk['scenario'][self.count] = scenario
+            self.chunk['value'][self.count] = values[scenario]
+            self.count += 1
+
+    def flush(self):
+        "Appends the rows collected so far to the files"
+        if self.count:
+            for name, column in COLUMNS:
+                column = os.path.join(self.path, '%s.bin' % name)
+                with open(column, 'ab') as f:
+                    self.chunk[name][:self.count].tofile(f)
+            self.count = 0
+
+    def close(self):
+        self.flush()
+
+    @property
+    def predictions(self):
+        "Stored predictions read back, as a (steps x scenarios) array"
+        self.flush()
+        return read_predictions(self.path)['predictions']
+
+    @property
+    def steps(self):
+        "Step of each row of the stored predictions read back"
+        self.flush()
+        return read_predictions(self.path)['steps']
+
+
+def read_predictions(path):
+    """
+    Reads predictions written by a FileSink, memory mapping the files.
+    Returns a dict of the keys, the step/scenario/value columns
+    and the predictions as a (steps x scenarios) array
+    (0.0 where a scenario wasn't stored at a step)
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    keys = tuple(meta['keys'])
+    data = {'keys': keys}
+    for name, dtype in COLUMNS:
+        dtype = dtype or meta['dtype']
+        column = os.path.join(path, '%s.bin' % name)
+        if os.path.exists(column) and os.path.getsize(column):
+            data[name] = np.memmap(column, dtype=dtype, mode='r')
+        else:
+            data[name] = np.zeros(0, dtype=dtype)
+
+    steps = np.unique(data['step'])
+    predictions = np.zeros((len(steps), len(keys)), dtype=meta['dtype'])
+    predictions[np.searchsorted(steps, data['step']),
+                data['scenario']] = data['value']
+    data['steps'] = steps
+    data['predictions'] = predictions
+    return data
+
+
+def plot_predictions(path, show=True):
+    """
+    Plots predictions written by a FileSink, offline from the experiment.
+    Each scenario is only plotted for the steps it was stored
+    """
+    import matplotlib.pyplot as plt
+    data = read_predictions(path)
+    for i, key in enumerate(data['keys']):
+        stored = data['scenario'] == i
+        plt.plot(data['step'][stored], data['value'][stored], label=key)
+    steps = data['steps']
+    plt.axis([0, steps[-1] + 1 if len(steps) else 1, 0, 1])
+    plt.legend(loc=1)
+    plt.grid(True)
+    if show:
+        plt.show()
@@ -0,0 +1,142 @@
+from collections import OrderedDict
+import numpy as np
+
+from .pavlov import Respondant
+from .protocol import ProtocolRun
+from .runner import name_of
+
+
+# options of a config for the protocol run, rather than the Respondant
+RUN_OPTIONS = ('randomised',)
+
+
+def checkpoint_score(trial, expected):
+    """
+    Score of a trial so far, as a tuple compared best first.
+    The fraction of the checks reached which decided as expected,
+    then the mean outcome of the events learnt from in the last round,
+    so configs which are learning score higher before any checks
+    """
+    results = trial.run.results
+    checked = [name for name in results if name in expected]
+    matched = sum(results[name] == expected[name] for name in checked)
+    fraction = float(matched) / len(checked) if checked else 0.0
+    recent = float(np.mean(trial.outcomes)) if trial.outcomes else 0.0
+    return fraction, recent
+
+
+class Trial(object):
+    """
+    A config being run through a protocol by a sweep,
+    keeping the outcomes learnt from since the last round
+    """
+    def __init__(self, index, config, run):
+        self.index = index
+        self.config = config
+        self.run = run
+        self.outcomes = []
+        self.score = None
+        # round it was dropped in, None if it survived
+        self.dropped = None
+        run.subject.add_hook('post_learn', self.learnt)
+
+    def learnt(self, subject, event, outcome):
+        self.outcomes.append(outcome)
+
+
+class Sweep(object):
+    """
+    Successive halving over configs (see runner.grid) for a protocol.
+
+    Every config is run for a short budget of steps and scored on
+    the protocol's checks so far (see checkpoint_score), then only the
+    best 1/eta carry on from where they were for a larger budget,
+    and so on until the last one has run the whole protocol.
+    Respondants are built from base updated with each config,
+    which can also hold the exploration (randomised) of the run.
+    expected maps the names of checks to the events they should decide,
+    min_steps is the least any config is run for
+    """
+    def __init__(self, protocol, configs, expected, base=None, seed=0,
+                 eta=2, min_steps=1, score=checkpoint_score):
+        if not configs:
+            raise ValueError("A sweep needs at least 1 config")
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        self.protocol = protocol
+        self.configs = list(configs)
+        self.expected = expected
+        self.base = base or {}
+        self.seed = seed
+        self.eta = eta
+        self.min_steps = min_steps
+        self.score = score
+        # the run of the best config, once run
+        self.best = None
+        # (round, steps, config index, score) for every trial each round
+        self.log = []
+        # steps run by every trial
+        self.steps = 0
+
+    def budgets(self):
+        "Steps each survivor has run by the end of each round"
+        rounds = 0
+        left = len(self.configs)
+        while left > 1:
+            left = -(-left // self.eta)
+            rounds += 1
+        total = self.protocol.total_steps
+        return [max(min(self.min_steps, total), total // self.eta ** r)
+                for r in range(rounds, 0, -1)] + [total]
+
+    def trial(self, index, config):
+        kwargs = dict(self.base)
+        kwargs.update((k, v) for k, v in config.items()
+                      if k not in RUN_OPTIONS)
+        subject = Respondant(seed=self.seed, **kwargs)
+        run = ProtocolRun(self.protocol, subject,
+                          randomised=config.get('randomised'))
+        return Trial(index, config, run)
+
+    def run(self):
+        """
+        Runs the sweep, returning a row per config best first,
+        holding its config, steps_run, score & decisions
+        (events given by name) and the round it was dropped in
+        """
+        trials = [self.trial(i, config)
+                  for i, config in enumerate(self.configs)]
+        everyone = list(trials)
+        budgets = self.budgets()
+        for number, budget in enumerate(budgets):
+            for trial in trials:
+                trial.outcomes = []
+                trial.run.advance(budget - trial.run.steps)
+                trial.score = self.score(trial, self.expected)
+                self.log.append((number, budget, trial.index, trial.score))
+            # sorted is stable, so ties keep the order of the configs
+            trials = sorted(trials, key=lambda t: t.score, reverse=True)
+            if number < len(budgets) - 1:
+                keep = -(-len(trials) // self.eta)
+                for trial in trials[keep:]:
+                    trial.dropped = number
+                trials = trials[:keep]
+        self.best = trials[0].run
+        self.steps = sum(trial.run.steps for trial in everyone)
+
+        # by the rounds survived, then score
+        rows = []
+        ranked = sorted(everyone, key=lambda t: (
+            len(budgets) if t.dropped is None else t.dropped, t.score),
+            reverse=True)
+        for trial in ranked:
+            row = OrderedDict([('config', trial.index)])
+            for key in sorted(trial.config):
+                row[key] = trial.config[key]
+            row['steps_run'] = trial.run.steps
+            row['dropped'] = trial.dropped
+            row['score'] = trial.score
+            for name, decision in trial.run.results.items():
+                row[name] = name_of(decision)
+            rows.append(row)
+        return rows
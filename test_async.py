@@ -0,0 +1,113 @@
+from .runner import run_concurrently, run_steps
+from .toy import low_action, switch_action, switch_subject
+import asyncio
+import json
+import numpy as np
+import pytest
+import threading
+
+
+LOCAL = [low_action, switch_action]
+
+
+class Simulator(object):
+    """
+    Local stand-in for an environment service, running the local events
+    for requests of a line of JSON, after a delay.
+    Counts how many requests it's handling at once
+    """
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.active = 0
+        self.most_active = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.active += 1
+        self.most_active = max(self.most_active, self.active)
+        request = json.loads((await reader.readline()).decode())
+        await asyncio.sleep(self.delay)
+        event = dict((e.__name__, e) for e in LOCAL)[request['event']]
+        outcome, environment = event(request['environment'])
+        writer.write(json.dumps([outcome, environment]).encode() + b'\n')
+        await writer.drain()
+        writer.close()
+        self.active -= 1
+
+    def remote(self, local):
+        "An event which calls the simulator to run the local event"
+        async def event(environment):
+            reader, writer = await asyncio.open_connection(
+                '127.0.0.1', self.port)
+            writer.write(json.dumps({'event': local.__name__,
+                                     'environment': environment}).encode()
+                         + b'\n')
+            outcome, environment = json.loads(
+                (await reader.readline()).decode())
+            writer.close()
+            return outcome, environment
+        event.__name__ = local.__name__
+        return event
+
+
+@pytest.mark.core
+def test_alearn():
+    "Learning from async events, matching learning from local ones"
+    async def experiment():
+        simulator = Simulator()
+        await simulator.start()
+        remote = [simulator.remote(e) for e in LOCAL]
+        subject = switch_subject(actions=remote)
+        decisions = []
+        for i in range(10):
+            event = await subject.adecide(randomised=0.5)
+            assert await subject.alearn(event, epochs=20) == 20
+            decisions.append(event.__name__)
+        simulator.server.close()
+        return subject, decisions
+
+    subject, decisions = asyncio.run(experiment())
+    local = switch_subject(actions=LOCAL)
+    for name in decisions:
+        event = local.decide(randomised=0.5)
+        assert event.__name__ == name
+        local.learn(event, epochs=20)
+
+    assert subject.environment == local.environment
+    for new, old in zip(subject.net.get_weights(), local.net.get_weights()):
+        assert np.allclose(new, old)
+    # plain functions can be awaited too
+    assert asyncio.run(local.alearn(low_action)) == 200
+
+
+@pytest.mark.core
+def test_run_concurrently():
+    "Respondants wait on the simulator at the same time"
+    # simulator in its own thread & event loop
+    simulator = Simulator(delay=0.02)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(simulator.start())
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+
+    async def protocol(subject):
+        events = await run_steps(subject, 5, randomised=0.5)
+        return [e.__name__ for e in events]
+
+    remote = [simulator.remote(e) for e in LOCAL]
+    subjects = [switch_subject(actions=remote, seed=seed) for seed in range(8)]
+    try:
+        results = run_concurrently(protocol, subjects, threads=4)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        simulator.server.close()
+        loop.close()
+
+    assert len(results) == 8
+    assert all(len(events) == 5 for events in results)
+    assert simulator.most_active > 1
@@ -0,0 +1,147 @@
+from .backends import NumpyNetwork, NeupyNetwork, build_network
+from .encoder import SparseRows
+from .pavlov import Respondant
+from .toy import high_action, low_action
+import numpy as np
+import pytest
+
+
+def mean_squared_error(net, inputs, target):
+    return np.mean((net.predict(inputs) - target) ** 2)
+
+
+@pytest.mark.core
+def test_numpy_gradients():
+    "A single epoch should step down the numerical gradient of the error"
+    STEP = 0.1
+    rng = np.random.RandomState(1)
+    inputs = rng.uniform(size=(5, 3))
+    target = rng.uniform(size=(5, 1))
+
+    net = NumpyNetwork((3, 4, 1), step=STEP, rng=rng)
+    before = net.get_weights()
+
+    # central difference of the error for every weight
+    expected = []
+    for weight in net.weights:
+        gradient = np.zeros_like(weight)
+        for index in np.ndindex(*weight.shape):
+            original = weight[index]
+            weight[index] = original + 1e-6
+            higher = mean_squared_error(net, inputs, target)
+            weight[index] = original - 1e-6
+            lower = mean_squared_error(net, inputs, target)
+            weight[index] = original
+            gradient[index] = (higher - lower) / 2e-6
+        expected.append(gradient)
+
+    net.train(inputs, target, epochs=1)
+    for old, new, gradient in zip(before, net.weights, expected):
+        assert np.allclose(old - new, STEP * gradient, atol=1e-8)
+
+
+@pytest.mark.core
+def test_numpy_network():
+    net = NumpyNetwork((2, 3, 1), step=1.0, rng=np.random.RandomState(0))
+    inputs = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+    target = np.array([0.1, 0.3, 0.5, 0.7])
+
+    net.train(inputs, target, epochs=5000)
+    assert np.allclose(net.predict(inputs).ravel(), target, atol=0.05)
+    # single rows after batches reuse the same buffers
+    assert net.predict(inputs[:1]).shape == (1, 1)
+
+    # weights can be copied between networks
+    other = NumpyNetwork((2, 3, 1))
+    other.set_weights(net.get_weights())
+    assert np.array_equal(other.predict(inputs), net.predict(inputs))
+
+    with pytest.raises(ValueError):
+        other.set_weights([np.zeros((2, 2)), np.zeros((4, 1))])
+    with pytest.raises(ValueError):
+        NumpyNetwork((2,))
+
+
+@pytest.mark.core
+def test_sparse_inputs():
+    "Sparse rows train & predict the same as the dense rows"
+    rng = np.random.RandomState(0)
+    # 3 slots of 5 one hot inputs, one slot off, & 2 dense values
+    columns = np.array([[0, 5, 10], [4, 9, -1], [2, 7, 14]])
+    sparse = SparseRows(columns, rng.uniform(size=(3, 2)), 17)
+    target = np.array([0.2, 0.5, 0.8])
+
+    net = NumpyNetwork((17, 4, 1), step=0.5, rng=rng)
+    dense = NumpyNetwork((17, 4, 1), step=0.5)
+    dense.set_weights(net.get_weights())
+    assert np.allclose(net.predict(sparse), dense.predict(sparse.dense()))
+
+    net.train(sparse, target, epochs=20)
+    dense.train(sparse.dense(), target, epochs=20)
+    for new, old in zip(net.get_weights(), dense.get_weights()):
+        assert np.allclose(new, old)
+    assert np.allclose(net.predict(sparse), dense.predict(sparse.dense()))
+
+
+@pytest.mark.core
+def test_adaptive_training():
+    inputs = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+    target = np.array([0.1, 0.3, 0.5, 0.7])
+
+    def build():
+        return NumpyNetwork((2, 3, 1), step=1.0,
+                            rng=np.random.RandomState(0))
+
+    # fixed epochs train for all of them
+    assert build().train(inputs, target, epochs=50) == 50
+
+    # stops once the error is within the tolerance
+    net = build()
+    used = net.train(inputs, target, epochs=5000, tolerance=1e-3)
+    assert 0 < used < 5000
+    error = net.predict(inputs).ravel() - target
+    assert np.mean(np.square(error)) <= 1e-3
+    # already within the tolerance, so nothing more to do
+    assert net.train(inputs, target, epochs=5000, tolerance=1e-3) == 0
+
+    # or once it stops improving, here on targets a sigmoid can't reach
+    net = build()
+    unreachable = np.array([-1, -1, 2, 2])
+    assert net.train(inputs, unreachable, epochs=5000, patience=20) < 5000
+
+
+@pytest.mark.core
+def test_select_backend():
+    subject = Respondant(actions=[low_action, high_action],
+                         backend=NumpyNetwork)
+    assert isinstance(subject.net, NumpyNetwork)
+    assert subject.net.layers == (2, 2, 1)
+
+    with pytest.raises(ValueError):
+        Respondant(backend='unknown')
+
+    # any callable taking the layers, step & rng
+    built = []
+    subject = Respondant(
+        backend=lambda layers, step, rng: built.append((layers, step, rng)),
+        hidden_layers=3, steps=0.2)
+    assert built == [((0, 3, 1), 0.2, subject.rng)]
+
+
+@pytest.mark.core
+def test_neupy_backend():
+    "Experimental backend, only run if neupy is installed"
+    pytest.importorskip('neupy')
+    net = build_network('neupy', (2, 3, 1), 0.1, np.random.RandomState(0))
+    assert isinstance(net, NeupyNetwork)
+    weights = net.get_weights()
+    assert [w.shape for w in weights] == [(3, 3), (4, 1)]
+    net.set_weights([w * 0.5 for w in weights])
+    assert np.allclose(net.get_weights()[0], weights[0] * 0.5)
+    with pytest.raises(ValueError):
+        net.set_weights([weights[1], weights[0]])
+
+    inputs = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+    target = np.array([0.1, 0.3, 0.5, 0.7])
+    assert net.train(inputs, target, epochs=5) == 5
+    assert net.train(inputs, target, epochs=5000, tolerance=1) == 0
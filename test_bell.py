@@ -1,52 +1,8 @@
-from .pavlov import Respondant
+from .bell import (FOOD, HIGH_SALIVATION, bell_subject, eat,
+                   predictions, salivation)
+import numpy as np
 import pytest
 
-# ENVIRONMENT VARIABLES
-
-FOOD_KEY = 'food_present'
-SALIVATION_KEY = 'saliver_levels'
-
-# ACTIONS
-
-
-def salivate(environment):
-    "Salivates"
-    # starts salivating
-    environment[SALIVATION_KEY] = 1.0
-    return 0.0, environment
-
-
-def rest(environment):
-    "Just sits and rests"
-    return 0.1, environment
-
-
-def eat(environment):
-    "Eats food and is the best thing ever!"
-    # eats food
-    environment[FOOD_KEY] = 0.0
-    # if salivating, then give bigger food kick
-    if environment[SALIVATION_KEY]:
-        environment[SALIVATION_KEY] = 0.0
-        return 1.0, environment
-    else:
-        return 0.5, environment
-
-
-def bell_with_food(environment):
-    "Food is given when bell is rung"
-    environment[FOOD_KEY] = 1.0
-    return 0.0, environment
-
-
-def bell_without_food(environment):
-    "No food given or taken away"
-    return 0.0, environment
-
-
-ACTIONS = [salivate, rest, eat]
-STIMULI = [bell_without_food, bell_with_food]
-
 
 @pytest.mark.experiment
 def test_learns_salivation_levels():
@@ -54,31 +10,22 @@ def test_learns_salivation_levels():
     Outline of tests is to show that it learns to salivate
     once the bell has been rung
     """
+    subject = bell_subject(seed=0)
+    salivation(subject)
+    # eating is far better if it's already salivating
+    assert subject.predict(eat, HIGH_SALIVATION) > \
+        subject.predict(eat, FOOD) + 0.3
 
-    no_food = {FOOD_KEY: 0.0, SALIVATION_KEY: 0.0}
-    low_salivation = {FOOD_KEY: 0.0, SALIVATION_KEY: 0.0}
-    high_salivation = {FOOD_KEY: 1.0, SALIVATION_KEY: 1.0}
-
-    subject = Respondant(
-        actions=ACTIONS,
-        stimuli=STIMULI,
-        environment={
-            FOOD_KEY: 0,
-            SALIVATION_KEY: 0,
-        },
-        hidden_layers=6,
-        history=1)
-
-    # learns to rest as standard
-    for i in range(200):
-        subject.learn(subject.decide(randomised=0.5))
-
-    # ring bell occasionally
-    for i in range(200):
-        if i % 10:
-            subject.learn(bell_with_food)
-        subject.learn(subject.decide(randomised=0.8))
 
+@pytest.mark.experiment
+def test_salivation_dtypes():
+    "Predicts the same outcomes with float32 as float64"
+    subjects = [bell_subject(seed=0), bell_subject(seed=0, dtype=np.float64)]
+    for subject in subjects:
+        salivation(subject)
+    # within what float32 rounding adds up to over the experiment
+    np.testing.assert_allclose(predictions(subjects[0]),
+                               predictions(subjects[1]), atol=1e-4)
 
 
 @pytest.mark.experiment
@@ -0,0 +1,36 @@
+from .benchmark import BASE_CASE, VARIED, cases, compare, main, throughput
+import json
+import pytest
+
+
+@pytest.mark.utility
+def test_cases():
+    found = cases()
+    assert found[0] == BASE_CASE
+    assert len(found) == 1 + sum(len(v) for v in VARIED.values())
+    # each only differs from the base by one option
+    for case in found[1:]:
+        assert len([k for k in case if case[k] != BASE_CASE[k]]) == 1
+
+
+@pytest.mark.utility
+def test_throughput():
+    rates = throughput(steps=2, actions=3, environment=0)
+    assert sorted(rates) == ['decide', 'learn', 'store_predictions']
+    assert all(rate > 0 for rate in rates.values())
+
+
+@pytest.mark.utility
+def test_compare(tmpdir):
+    before = {'results': {'learn': 100.0, 'decide': 1000.0, 'new': 1.0}}
+    after = {'results': {'learn': 80.0, 'decide': 950.0, 'newer': 1.0}}
+    assert compare(before, after) == [('learn', 100.0, 80.0)]
+    assert compare(before, after, slowdown=0.3) == []
+
+    paths = []
+    for name, results in (('before', before), ('after', after)):
+        paths.append(str(tmpdir.join(name + '.json')))
+        with open(paths[-1], 'w') as f:
+            json.dump(results, f)
+    assert main(['compare'] + paths) == 1
+    assert main(['compare', paths[0], paths[0]]) == 0
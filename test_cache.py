@@ -0,0 +1,46 @@
+from .cache import PredictionCache
+from .toy import switch_action, switch_subject
+import pytest
+
+
+@pytest.mark.utility
+def test_prediction_cache():
+    cache = PredictionCache(size=2)
+    assert cache.get('a', 0) is None
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a', 0) == 1
+    # least recently used is dropped
+    cache.put('c', 3)
+    assert cache.get('b', 0) is None
+    assert len(cache) == 2
+    # all dropped for another version
+    assert cache.get('a', 1) is None
+    assert cache.stats == {'hits': 1, 'misses': 3, 'hit_rate': 0.25,
+                           'entries': 0}
+    with pytest.raises(ValueError):
+        PredictionCache(0)
+
+
+@pytest.mark.core
+def test_cached_decisions():
+    subject, uncached = switch_subject(cache=16), switch_subject()
+    assert uncached.cache is None
+    assert switch_subject(cache=False).cache is None
+    assert switch_subject(cache=True).cache.size == PredictionCache().size
+
+    for i in range(10):
+        # asked repeatedly between training
+        for j in range(3):
+            event = subject.decide(randomised=0.5)
+            assert uncached.decide(randomised=0.5) == event
+            assert subject.predict(switch_action, {'a': 1.0}) == \
+                uncached.predict(switch_action, {'a': 1.0})
+        subject.learn(event, epochs=10)
+        uncached.learn(event, epochs=10)
+
+    # trained every step, so only the repeats hit the cache
+    assert subject.weight_version == 10
+    stats = subject.cache.stats
+    assert stats['hits'] == 10 * 4
+    assert stats['misses'] == 10 * 2
@@ -0,0 +1,70 @@
+from .candidates import RecentBest
+from .pavlov import Respondant
+import pytest
+
+
+def make_action(outcome):
+    def action(environment):
+        return outcome, environment
+    action.__name__ = 'action_%s' % outcome
+    return action
+
+
+ACTIONS = [make_action(i / 10.0) for i in range(1, 10)]
+
+
+def trained(**kwargs):
+    "A respondant which has learnt the outcome of every action"
+    subject = Respondant(actions=ACTIONS, environment={'a': 0.0}, seed=0,
+                         hidden_layers=4, steps=0.5, **kwargs)
+    for i in range(30):
+        for action in ACTIONS:
+            subject.learn(action, epochs=20)
+    return subject
+
+
+@pytest.mark.core
+def test_top_k():
+    subject = trained()
+    best = subject.decide(top_k=3)
+    assert [action for action, score in best] == ACTIONS[:-4:-1]
+    # scores are the predicted outcomes, best first
+    for action, score in best:
+        assert score == pytest.approx(subject.predict(action))
+    assert best[0][0] == subject.decide()
+    assert len(subject.decide(top_k=100)) == len(ACTIONS)
+    assert Respondant().decide(top_k=3) == []
+
+
+@pytest.mark.core
+def test_candidate_filter():
+    low = ACTIONS[:3]
+    subject = trained(candidates=lambda respondant, environment: low)
+    # only the candidates are scored
+    assert subject.decide() == low[-1]
+    assert [a for a, s in subject.decide(top_k=5)] == low[::-1]
+
+
+@pytest.mark.core
+def test_recent_best():
+    recent = RecentBest(remember=2, explore=1, states=2)
+    subject = trained(candidates=recent)
+
+    # everything is a candidate in a new state
+    assert subject.decide() == ACTIONS[-1]
+    # then the best remembered, plus one other to explore
+    candidates = recent(subject)
+    assert candidates[0] == ACTIONS[-1]
+    assert len(candidates) == 2
+    assert subject.decide() == ACTIONS[-1]
+
+    # remembers up to 2 of the candidates scored
+    best = [a for a, s in subject.decide(top_k=2)]
+    assert best[0] == ACTIONS[-1]
+    assert recent.best[recent.key(subject)] == best
+
+    # only the latest states are kept
+    subject.decide({'a': 1.0})
+    subject.decide({'a': 0.5})
+    assert recent(subject) is None
+    assert len(recent.best) == 2
@@ -0,0 +1,77 @@
+from .backends import NumpyNetwork, StackedNetwork
+from .cohort import Cohort
+from .pavlov import Respondant
+from .gate import (ACTIONS, STIMULI, DANGER, GATE, NORMAL,
+                   IN_DANGER_GATE_OPEN, rest, run, shock)
+from .toy import low_action, switch_action
+import numpy as np
+import pytest
+
+
+@pytest.mark.core
+def test_stacked_network():
+    "Stacked networks train & predict the same as separate networks"
+    rng = np.random.RandomState(0)
+    stacked = StackedNetwork((3, 4, 1), step=0.5, size=3, rng=rng)
+    separate = [NumpyNetwork((3, 4, 1), step=0.5) for i in range(3)]
+    for i, net in enumerate(separate):
+        net.set_weights(stacked.get_weights(i))
+
+    inputs = rng.uniform(size=(3, 5, 3))
+    target = rng.uniform(size=(3, 5, 1))
+    stacked.train(inputs, target, epochs=20)
+    for i, net in enumerate(separate):
+        net.train(inputs[i], target[i], epochs=20)
+
+    predicted = stacked.predict(inputs)
+    for i, net in enumerate(separate):
+        assert np.allclose(predicted[i], net.predict(inputs[i]))
+        for new, old in zip(stacked.get_weights(i), net.get_weights()):
+            assert np.allclose(new, old)
+
+
+@pytest.mark.core
+def test_cohort_matches_respondant():
+    "A cohort of one makes the same decisions as a Respondant"
+    kwargs = dict(actions=[low_action, switch_action],
+                  environment={'a': 0.0}, sequence_memory=1, seed=3)
+    cohort = Cohort(1, **kwargs)
+    subject = Respondant(**kwargs)
+
+    for i in range(20):
+        event = subject.decide(randomised=0.5)
+        assert cohort.decide(randomised=0.5) == [event]
+        subject.learn(event, epochs=20)
+        cohort.learn([event], epochs=20)
+
+    assert cohort.environments == [subject.environment]
+    for action in subject.actions:
+        assert np.allclose(cohort.predict(action), subject.predict(action))
+
+    # can take a member out as its own Respondant
+    member = cohort.respondant(0)
+    assert member.input_data(low_action) == subject.input_data(low_action)
+    assert np.allclose(member.predict(switch_action),
+                       subject.predict(switch_action))
+
+    with pytest.raises(ValueError):
+        cohort.learn([low_action, low_action])
+    with pytest.raises(ValueError):
+        Cohort(0)
+
+
+@pytest.mark.experiment
+def test_cohort_learns_to_escape():
+    "The first phases of the learned helplessness experiment, for 16 dogs"
+    cohort = Cohort(16, actions=ACTIONS, stimuli=STIMULI,
+                    environment={DANGER: 0, GATE: 0},
+                    hidden_layers=6, seed=0)
+
+    for i in range(100):
+        cohort.step(randomised=0.4)
+    assert cohort.decide(NORMAL) == [rest] * 16
+
+    for i in range(300):
+        cohort.step(randomised=0.4, stimulus=shock, probability=0.4)
+    assert cohort.decide(IN_DANGER_GATE_OPEN).count(run) >= 14
+    assert cohort.decide(NORMAL).count(rest) >= 14
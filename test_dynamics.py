@@ -0,0 +1,78 @@
+from .bell import FOOD_KEY, SALIVATION_KEY, eat
+from .cohort import Cohort
+from .dynamics import ArrayEvent, Rule
+from .gate import DANGER, GATE, rest, run, shock
+from .pavlov import Respondant
+import numpy as np
+import pytest
+
+
+def run_array(values, columns):
+    "Same as gate.run, for a batch of environments"
+    danger = values[:, columns[DANGER]] > 0
+    closed = values[:, columns[GATE]] > 0
+    values[danger & ~closed, columns[DANGER]] = 0
+    return np.where(danger, np.where(closed, 0.01, 0.5), 0.1)
+
+
+REST = Rule('rest', 0.6, when=[(DANGER, 0.1)])
+RUN = ArrayEvent(run_array, 'run')
+SHOCK = Rule('shock', 0.01, set={DANGER: 1})
+
+
+@pytest.mark.utility
+def test_rules():
+    "Rules are callable like the event functions they declare"
+    rule = Rule('eat', 0.5, clear=[FOOD_KEY, SALIVATION_KEY],
+                when=[(SALIVATION_KEY, 1.0)])
+    for food in (0.0, 1.0):
+        for salivation in (0.0, 1.0):
+            environment = {FOOD_KEY: food, SALIVATION_KEY: salivation}
+            assert rule(dict(environment)) == eat(dict(environment))
+
+    # the first match takes precedence
+    rule = Rule('rule', 0.0, when=[('a', 1.0), ('b', 0.5)])
+    values = np.array([[0, 0], [0, 1], [1, 0], [1, 1]], dtype=float)
+    assert rule.apply(values, ('a', 'b')).tolist() == [0.0, 0.5, 1.0, 1.0]
+
+    with pytest.raises(KeyError):
+        SHOCK({GATE: 0})
+    assert RUN({DANGER: 1, GATE: 0}) == (0.5, {DANGER: 0, GATE: 0})
+    assert RUN.__name__ == 'run'
+
+
+@pytest.mark.utility
+def test_respondant_array_events():
+    subject = Respondant(actions=[REST, RUN], stimuli=[SHOCK],
+                         environment={DANGER: 0, GATE: 1}, seed=0)
+    subject.learn(SHOCK)
+    assert subject.environment == {DANGER: 1, GATE: 1}
+    subject.environment[GATE] = 0
+    subject.learn(RUN)
+    assert subject.environment == {DANGER: 0, GATE: 0}
+    assert subject.decide() in (REST, RUN)
+
+
+@pytest.mark.core
+def test_cohort_array_events():
+    "Array events step a cohort the same as the event functions"
+    environment = {DANGER: 0, GATE: 0}
+    names = []
+    for events in ([rest, run, shock], [REST, RUN, SHOCK], [rest, RUN, SHOCK]):
+        cohort = Cohort(8, actions=events[:2], stimuli=events[2:],
+                        environment=environment, seed=0)
+        steps = []
+        for i in range(30):
+            if i == 15:
+                cohort.update_environment({GATE: 1})
+            steps.append([e.__name__ for e in cohort.step(
+                randomised=0.5, stimulus=events[2], probability=0.3,
+                epochs=5)])
+        names.append((steps, cohort.values.tolist()))
+    assert names[0] == names[1] == names[2]
+    assert cohort.environments[0] == cohort.environment(0)
+
+    with pytest.raises(KeyError):
+        cohort.update_environment({'missing': 1})
+    with pytest.raises(ValueError):
+        cohort.learn(Rule('over', set={DANGER: 2}))
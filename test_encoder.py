@@ -0,0 +1,76 @@
+from .pavlov import normalised_dict_from_list
+from .encoder import Encoder
+from .toy import high_action, low_action
+import numpy as np
+import pytest
+
+
+def unknown(environment):
+    return 0.5, environment
+
+
+EVENTS = normalised_dict_from_list([low_action, high_action])
+
+
+@pytest.mark.core
+def test_encoder_tables():
+    verbose = Encoder(EVENTS, ['z', 'a'], sequence_memory=1)
+    compact = Encoder(EVENTS, ['z', 'a'], sequence_memory=1,
+                      verbose_neurons=False)
+
+    # environment always in sorted key order
+    assert verbose.keys == compact.keys == ('a', 'z')
+    assert verbose.width == 2 * 2 + 2
+    assert compact.width == 2 + 2
+
+    env = {'z': 0.9, 'a': 0.1}
+    assert verbose.encode(high_action, env, [low_action]).tolist() == \
+        [[0, 1, 1, 0, 0.1, 0.9]]
+    assert compact.encode(high_action, env, [low_action]).tolist() == \
+        [[1.0, 0.0, 0.1, 0.9]]
+
+    # unknown events don't switch on any verbose inputs
+    assert verbose.encode(unknown, env, [unknown]).tolist() == \
+        [[0, 0, 0, 0, 0.1, 0.9]]
+    with pytest.raises(KeyError):
+        compact.encode(unknown, env, [])
+
+
+@pytest.mark.core
+def test_encoder_many():
+    encoder = Encoder(EVENTS, ['a'], sequence_memory=2)
+    env = {'a': 0.5}
+
+    # missing history defaults to each row's own event
+    indices = encoder.indices([low_action, high_action])
+    matrix = encoder.encode_many(indices, env, [high_action])
+    assert matrix.tolist() == [
+        [1, 0, 0, 1, 1, 0, 0.5],
+        [0, 1, 0, 1, 0, 1, 0.5],
+    ]
+
+    # rows are written into the reused buffer
+    single = encoder.encode(low_action, env, [])
+    assert single.base is encoder.buffer
+
+    with pytest.raises(TypeError):
+        encoder.encode(low_action, env, 1)
+
+
+@pytest.mark.core
+def test_encoder_sparse():
+    encoder = Encoder(EVENTS, ['z', 'a'], sequence_memory=2)
+    env = {'z': 0.9, 'a': 0.1}
+    indices = encoder.indices([low_action, high_action, unknown])
+
+    for history in ([], [high_action], [unknown, low_action]):
+        sparse = encoder.sparse_many(indices, env, history)
+        # the inputs switched on per memory slot, offset by the slot
+        assert sparse.columns.shape == (3, 3)
+        assert np.array_equal(sparse.dense(),
+                              encoder.encode_many(indices, env, history))
+    assert sparse.columns[0].tolist() == [0, 2, -1]
+    assert sparse.off is not None
+
+    with pytest.raises(ValueError):
+        Encoder(EVENTS, verbose_neurons=False).sparse_many([0], {}, [])
@@ -0,0 +1,63 @@
+from .history import History
+from .toy import high_action, low_action
+from .pavlov import Respondant
+import pytest
+
+
+@pytest.mark.core
+def test_ring_buffer():
+    history = History(2)
+    assert history == []
+    with pytest.raises(IndexError):
+        history[-1]
+
+    history.append(low_action)
+    history.append(high_action)
+    assert history == [low_action, high_action]
+
+    # forgets the oldest once full
+    history.append(high_action)
+    assert history == [high_action, high_action]
+    assert history[-1] == high_action and history[0] == high_action
+    assert len(history) == 2 and history.total == 3
+
+    with pytest.raises(ValueError):
+        History(0)
+
+
+@pytest.mark.core
+def test_trace(tmpdir):
+    path = str(tmpdir.join('trace.txt'))
+    with Respondant(actions=[low_action, high_action], trace=path) as subject:
+        for event in (low_action, high_action, high_action, low_action):
+            subject.learn(event, epochs=1)
+        trace = subject.history.trace
+
+    # only the last event is held in memory, every event on disk
+    assert trace.closed
+    assert subject.history == [low_action]
+    with open(path) as f:
+        assert f.read().split() == ['low_action', 'high_action',
+                                    'high_action', 'low_action']
+
+    # an open file is only flushed, it's up to the caller to close
+    with open(path, 'w') as f:
+        subject = Respondant(actions=[low_action, high_action], trace=f)
+        subject.learn(high_action, epochs=1)
+        subject.close()
+        assert not f.closed
+        with open(path) as written:
+            assert written.read().split() == ['high_action']
+
+
+@pytest.mark.core
+def test_encoded_window():
+    subject = Respondant(actions=[low_action, high_action], sequence_memory=2)
+
+    for event in (low_action, high_action, high_action):
+        subject.learn(event, epochs=1)
+
+    # the shifted window matches re-deriving from a full list of events
+    assert subject.input_data(low_action) == \
+        subject.input_data(low_action,
+                           history=[low_action, high_action, high_action])
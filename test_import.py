@@ -0,0 +1,20 @@
+from .benchmark import PACKAGE, fresh_import, main
+import pytest
+
+
+@pytest.mark.utility
+def test_import_is_lightweight():
+    seconds, modules = fresh_import('pavlov')
+    # no backends or plotting until they're used
+    assert '%s.backends' % PACKAGE not in modules
+    assert 'neupy' not in modules
+    assert 'matplotlib' not in modules
+    assert 'multiprocessing' not in modules
+
+
+@pytest.mark.utility
+def test_import_budget():
+    # the time itself depends on the machine, so is only checked
+    # against the budget by the benchmark command
+    assert main(['import', '--budget', '0']) == 1
+    assert main(['import', '--budget', '1000']) == 0
@@ -0,0 +1,73 @@
+from .instrument import PHASES, Stats
+from .toy import low_action, switch_subject
+import pytest
+
+
+SCENARIOS = {'low': (low_action, None)}
+
+
+def experiment(subject):
+    "Decides & learns a few times, returning the decisions"
+    decisions = []
+    for i in range(5):
+        decisions.append(subject.decide(randomised=0.5))
+        subject.learn(decisions[-1], epochs=10)
+        subject.store_predictions()
+    return decisions
+
+
+@pytest.mark.utility
+def test_stats():
+    subject = switch_subject(scenarios=SCENARIOS,
+                             instrument=Stats(trace=True))
+    # timing doesn't change what happens
+    other = switch_subject(scenarios=SCENARIOS)
+    assert experiment(subject) == experiment(other)
+
+    stats = subject.stats
+    assert stats.steps == 5
+    summary = stats.summary()
+    assert list(summary) == list(PHASES)
+    assert summary['event'][0] == 5
+    assert summary['backward'][0] == 5
+    assert summary['predictions'][0] == 5
+    # one forward pass to decide, one for the scenarios
+    assert summary['forward'][0] == 10
+    assert summary['encode'][0] >= 10
+    assert all(seconds >= 0 for count, seconds, mean in summary.values())
+    assert 'backward' in str(stats)
+
+    # a trace of each step
+    assert [step[0] for step in stats.step_trace] == list(range(5))
+    assert stats.step_trace[0][1] in ('low_action', 'switch_action')
+    # store_predictions comes after learn, so is in the next step
+    assert set(stats.step_trace[1][2]) == set(PHASES)
+
+    # carries on when copied
+    forked = subject.fork()
+    forked.learn(low_action)
+    assert forked.stats.steps == 6
+    stats.reset()
+    assert stats.steps == 0 and stats.step_trace == []
+
+
+@pytest.mark.utility
+def test_hooks():
+    subject = switch_subject(scenarios=SCENARIOS)
+    assert subject.stats is None
+    calls = []
+    subject.add_hook('pre_decide', lambda s, env: calls.append('pre_decide'))
+    subject.add_hook('post_decide',
+                     lambda s, decision: calls.append(decision.__name__))
+    subject.add_hook('pre_learn', lambda s, e: calls.append('pre_learn'))
+    subject.add_hook('post_learn',
+                     lambda s, e, outcome: calls.append(outcome))
+
+    subject.learn(subject.decide())
+    assert calls[0] == 'pre_decide'
+    assert calls[1] in ('low_action', 'switch_action')
+    assert calls[2:] == ['pre_learn', 0.1 if calls[1] == 'low_action'
+                         else 0.9]
+
+    with pytest.raises(ValueError):
+        subject.add_hook('during_learn', lambda s: None)
@@ -1,18 +1,11 @@
+from . import pavlov, sinks
 from .pavlov import Respondant, normalised_dict_from_list
+from .toy import high_action, low_action
+import numpy as np
 import random
 import pytest
 
 
-def low_action(environment):
-    "An action which returns a low outcome"
-    return 0.1, environment
-
-
-def high_action(environment):
-    "An action which returns a high outcome"
-    return 0.9, environment
-
-
 def middle_action(environment):
     "An action which returns a medium outcome"
     return 0.5, environment
@@ -74,8 +67,9 @@ def test_input_data_history():
     assert elephant.input_data(low_action) == [[0.0, 0.0, 1.0]]
     elephant.learn(low_action)
 
-    assert elephant.history == [low_action,
-                                high_action, low_action, low_action]
+    # only remembers as far back as its sequence memory
+    assert elephant.history == [low_action, low_action]
+    assert elephant.history.total == 4
 
 
 @pytest.mark.core
@@ -84,8 +78,10 @@ def test_verbose_neuron_input_data():
     STIMULI = [environment_stimulus]
     ENVIRON = {'a': 0.1, 'z': 0.9}
 
+    # float64, to compare the exact values rather than float32 roundings
     extras = Respondant(actions=TEST_ACTIONS, environment=ENVIRON,
-                        stimuli=STIMULI, verbose_neurons=True)
+                        stimuli=STIMULI, verbose_neurons=True,
+                        dtype=np.float64)
 
     # actions + stimuli + environment
     assert extras.input_data(low_action) == [[1, 0, 0, 0.1, 0.9]]
@@ -93,7 +89,8 @@ def test_verbose_neuron_input_data():
     assert extras.input_data(environment_stimulus) == [[0, 0, 1, 0.1, 0.9]]
 
     history = Respondant(actions=TEST_ACTIONS, environment={'a': 0.1},
-                         sequence_memory=1, verbose_neurons=True)
+                         sequence_memory=1, verbose_neurons=True,
+                         dtype=np.float64)
 
     # uses inputted event as default for history (low_action, low_action, env)
     assert history.input_data(low_action) == [[1, 0, 1, 0, 0.1]]
@@ -108,7 +105,8 @@ def test_input_data_environment():
     ENVIRON = {'a': 0.1, 'z': 0.9}
 
     subject = Respondant(actions=TEST_ACTIONS, environment=ENVIRON,
-                         verbose_neurons=False, sequence_memory=1)
+                         verbose_neurons=False, sequence_memory=1,
+                         dtype=np.float64)
 
     # action, memory(1), self.environment
     assert subject.input_data(low_action) == [[0.0, 0.0, 0.1, 0.9]]
@@ -183,6 +181,116 @@ def test_decide():
     assert subject.decide() == high_action
 
 
+@pytest.mark.core
+def test_decide_many():
+    TEST_ACTIONS = [low_action, middle_action, high_action]
+    ENVIRONMENTS = [{'a': 0.0}, {'a': 0.5}, {'a': 1.0}]
+
+    subject = Respondant(actions=TEST_ACTIONS, environment={'a': 0.0})
+
+    for i in range(5):
+        for action in TEST_ACTIONS:
+            subject.learn(action)
+
+    # a single pass gives the same answers as deciding one at a time
+    assert subject.decide_many(ENVIRONMENTS) == \
+        [subject.decide(environment) for environment in ENVIRONMENTS]
+    assert subject.decide_many([]) == []
+
+    # nothing to decide between
+    assert Respondant().decide() is None
+    assert Respondant().decide_many([{}, {}]) == [None, None]
+
+
+@pytest.mark.core
+def test_store_predictions(monkeypatch):
+    TEST_ACTIONS = [low_action, high_action]
+    SCENARIOS = {
+        'low': (low_action, {'a': 0.5}),
+        'high': (high_action, {'a': 0.5}),
+        # uses the current environment & history
+        'current': (high_action, None),
+        'history': (low_action, {'a': 0.0}, [high_action]),
+    }
+    # start with a small log, to check it grows
+    monkeypatch.setattr(sinks, 'PREDICTION_ROWS', 2)
+
+    subject = Respondant(actions=TEST_ACTIONS, environment={'a': 0.1},
+                         sequence_memory=1, scenarios=SCENARIOS,
+                         prediction_interval=2)
+    assert subject.scenario_keys == ('current', 'high', 'history', 'low')
+
+    expected = []
+    for i in range(6):
+        subject.learn(TEST_ACTIONS[i % 2], epochs=10)
+        subject.store_predictions(['low', 'current', 'history'])
+        # all scenarios predicted in one pass, but only every other step
+        if i % 2 == 0:
+            expected.append([
+                subject.predict(*SCENARIOS['current']), 0.0,
+                subject.predict(*SCENARIOS['history']),
+                subject.predict(*SCENARIOS['low'])])
+
+    assert subject.predictions.shape == (3, 4)
+    assert np.allclose(subject.predictions, expected)
+
+    with pytest.raises(ValueError):
+        Respondant().store_predictions()
+
+
+@pytest.mark.core
+def test_sparse():
+    "Sparse inputs make the same decisions as dense ones"
+    TEST_ACTIONS = [low_action, middle_action, high_action]
+
+    def build(sparse):
+        return Respondant(actions=TEST_ACTIONS, environment={'a': 0.5},
+                          sequence_memory=2, seed=0, sparse=sparse)
+
+    sparse, dense = build(True), build(False)
+    for i in range(10):
+        event = dense.decide(randomised=0.5)
+        assert sparse.decide(randomised=0.5) == event
+        sparse.learn(event, epochs=20)
+        dense.learn(event, epochs=20)
+    for action in TEST_ACTIONS:
+        assert np.isclose(sparse.predict(action), dense.predict(action))
+
+    with pytest.raises(ValueError):
+        Respondant(verbose_neurons=False, sparse=True)
+
+
+@pytest.mark.core
+def test_dtype():
+    "float32 throughout by default, or as given"
+    for dtype in (np.float32, np.float64):
+        kwargs = {} if dtype is np.float32 else {'dtype': dtype}
+        subject = Respondant(actions=[low_action, high_action],
+                             environment={'a': 0.5}, sequence_memory=1,
+                             scenarios={'low': (low_action, None)}, **kwargs)
+        subject.learn(low_action, epochs=5)
+        subject.store_predictions()
+        assert subject.dtype == dtype
+        assert subject.encode(high_action).dtype == dtype
+        assert all(w.dtype == dtype for w in subject.net.get_weights())
+        assert subject.predict(low_action).dtype == dtype
+        assert subject.predictions.dtype == dtype
+
+
+@pytest.mark.core
+def test_adaptive_epochs():
+    subject = Respondant(actions=[low_action], seed=0, tolerance=1e-4)
+    assert subject.learn(low_action, epochs=50) == 50
+    used = [subject.learn(low_action) for i in range(20)]
+    # stops early once it's learnt the outcome
+    assert used[-1] < pavlov.EPOCHS
+    assert subject.last_epochs == used[-1]
+    assert abs(subject.predict(low_action) - 0.1) < 0.01
+
+    # a fixed number of epochs without a tolerance
+    assert Respondant(actions=[low_action]).learn(low_action, 10) == 10
+
+
 def assert_prediction(subject, error):
     "Simple wrapper to assert level of predictions"
     for action in subject.actions:
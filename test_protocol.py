@@ -0,0 +1,92 @@
+from .cohort import Cohort
+from .pavlov import Respondant
+from .protocol import Phase, Protocol, ProtocolRun
+from .gate import (ACTIONS, STIMULI, DANGER, GATE, NORMAL,
+                   IN_DANGER_GATE_OPEN, LEARNED_HELPLESSNESS, rest, run)
+from .toy import low_action, reset, switch_action
+import numpy as np
+import pytest
+
+
+BASE = {'actions': [low_action, switch_action], 'stimuli': [reset],
+        'environment': {'a': 0.0}, 'sequence_memory': 1}
+BASE_SCENARIOS = dict(BASE, scenarios={'low': (low_action, None)})
+
+PROTOCOL = Protocol([
+    Phase(10, randomised=0.5, record=['low'], epochs=20,
+          checks=[('1. start', {'a': 0.0})]),
+    Phase(10, stimulus=reset, probability=0.5, randomised=0.2,
+          environment={'a': 1.0}, epochs=20,
+          checks=[('2. start', {'a': 0.0}), ('2. changed', {'a': 1.0})]),
+])
+
+
+@pytest.mark.utility
+def test_phases():
+    with pytest.raises(ValueError):
+        Phase(-1)
+    with pytest.raises(ValueError):
+        Phase(10, probability=0.5)
+    with pytest.raises(ValueError):
+        Protocol([Phase(1, checks=[('a', {})]), Phase(1, checks=[('a', {})])])
+
+    subject = Respondant(seed=0)
+    assert Phase(10).draws(subject.rng) is None
+    assert Phase(10, reset, 0.5).draws(subject.rng).shape == (10,)
+    assert Phase(10, reset, 0.5).draws(subject.rng, 3).shape == (10, 3)
+
+
+@pytest.mark.core
+def test_protocol_backends():
+    "The same protocol run on a respondant, cohort & population"
+    subject = Respondant(seed=0, **BASE_SCENARIOS)
+    results = PROTOCOL.run(subject)
+    assert list(results) == ['1. start', '2. start', '2. changed']
+    assert subject.predictions.shape == (10, 1)
+    assert subject.history.total == 20
+
+    # a cohort of one draws the same random numbers
+    cohort = Cohort(1, seed=0, **BASE)
+    assert PROTOCOL.run_cohort(cohort) == \
+        dict((name, [event]) for name, event in results.items())
+    state, cohort_state = subject.rng.get_state(), cohort.rng.get_state()
+    assert state[2] == cohort_state[2]
+    assert np.array_equal(state[1], cohort_state[1])
+    for a, b in zip(subject.net.get_weights(), cohort.net.get_weights(0)):
+        np.testing.assert_allclose(a, b, rtol=1e-5)
+
+    # predictions are only recorded if there are scenarios
+    assert PROTOCOL.run(Respondant(seed=0, **BASE)) == results
+    rows = PROTOCOL.run_population(BASE, seeds=[0, 1], processes=2)
+    assert [row['seed'] for row in rows] == [0, 1]
+    for name, event in results.items():
+        assert rows[0][name] == event.__name__
+
+
+@pytest.mark.experiment
+def test_cohort_protocol():
+    "The first phases of the learned helplessness protocol, for 16 dogs"
+    cohort = Cohort(16, actions=ACTIONS, stimuli=STIMULI,
+                    environment={DANGER: 0, GATE: 0},
+                    hidden_layers=6, seed=0)
+    results = Protocol(LEARNED_HELPLESSNESS.phases[:2]).run_cohort(cohort)
+    assert results['1. No danger'].count(rest) >= 14
+    assert results['2. Danger, gate open'].count(run) >= 14
+    assert results['2. No danger'].count(rest) >= 14
+    assert cohort.decide(IN_DANGER_GATE_OPEN).count(run) >= 14
+    assert cohort.decide(NORMAL).count(rest) >= 14
+
+
+@pytest.mark.utility
+def test_protocol_run():
+    "A run paused & carried on, or forked, decides the same"
+    results = PROTOCOL.run(Respondant(seed=0, **BASE_SCENARIOS))
+    run = ProtocolRun(PROTOCOL, Respondant(seed=0, **BASE_SCENARIOS))
+    assert run.advance(7) == {}
+    forked = run.fork()
+    assert list(run.advance(7)) == ['1. start']
+    assert run.steps == 14 and not run.done
+    assert run.advance() == results
+    assert run.done and run.advance(5) == results
+    assert forked.steps == 7
+    assert forked.advance() == results
@@ -0,0 +1,53 @@
+from .pavlov import Respondant
+from .replay import ReplayBuffer
+from .toy import high_action, low_action
+import numpy as np
+import pytest
+
+
+@pytest.mark.core
+def test_replay_buffer():
+    replay = ReplayBuffer(capacity=4, batch_size=3, train_every=2)
+
+    replay.add([0, 0], 0.0)
+    assert not replay.due()
+    replay.add([1, 1], 0.1)
+    assert replay.due()
+
+    # both new transitions are in the batch
+    inputs, outcomes = replay.sample()
+    assert inputs.tolist() == [[1, 1], [0, 0]]
+    assert outcomes.tolist() == [[0.1], [0.0]]
+    assert not replay.due()
+
+    # overwrites the oldest once full
+    for i in range(2, 6):
+        replay.add([i, i], i / 10)
+    assert len(replay) == 4
+    assert sorted(replay.inputs[:, 0].tolist()) == [2, 3, 4, 5]
+
+    # latest transitions, topped up at random with older ones
+    inputs, outcomes = replay.sample()
+    assert inputs[:2].tolist() == [[5, 5], [4, 4]]
+    assert inputs[2, 0] in (2, 3)
+
+    with pytest.raises(ValueError):
+        ReplayBuffer(batch_size=2, train_every=3)
+
+
+@pytest.mark.core
+def test_learn_with_replay():
+    TEST_ACTIONS = [low_action, high_action]
+    replay = ReplayBuffer(batch_size=8, train_every=4, epochs=200)
+
+    subject = Respondant(actions=TEST_ACTIONS, replay=replay, seed=0)
+
+    for i in range(10):
+        for action in TEST_ACTIONS:
+            subject.learn(action)
+
+    # every transition was stored and trained on in batches
+    assert len(replay) == 20 and not replay.due()
+    assert subject.decide() == high_action
+    assert np.allclose([subject.predict(a) for a in TEST_ACTIONS],
+                       [0.1, 0.9], atol=0.2)
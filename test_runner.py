@@ -0,0 +1,48 @@
+from .runner import grid, run_population
+from .toy import high_action, low_action
+import numpy as np
+import pytest
+
+
+BASE = {
+    'actions': [low_action, high_action],
+    'scenarios': {'low': (low_action, {}), 'high': (high_action, {})},
+}
+
+
+def alternate(subject):
+    "Learns each action in turn, storing predictions as it goes"
+    for i in range(5):
+        for action in subject.actions:
+            subject.learn(action)
+        subject.store_predictions()
+    return {'best': subject.decide(), 'random': subject.decide(randomised=1)}
+
+
+@pytest.mark.utility
+def test_grid():
+    assert grid() == [{}]
+    assert grid(steps=[0.1, 0.2], hidden_layers=[3]) == [
+        {'hidden_layers': 3, 'steps': 0.1},
+        {'hidden_layers': 3, 'steps': 0.2},
+    ]
+
+
+@pytest.mark.core
+def test_run_population():
+    configs = grid(hidden_layers=[2, 3])
+    rows = run_population(alternate, BASE, configs, seeds=[0, 1],
+                          processes=2)
+
+    # a row per config & seed, in order
+    assert [(r['hidden_layers'], r['seed']) for r in rows] == \
+        [(2, 0), (2, 1), (3, 0), (3, 1)]
+    assert all(r['best'] == 'high_action' for r in rows)
+    assert all(r['predictions'].shape == (5, 2) for r in rows)
+
+    # each seed is reproducible, whichever process it runs in
+    serial = run_population(alternate, BASE, configs, seeds=[0, 1],
+                            processes=1)
+    assert [r['random'] for r in rows] == [r['random'] for r in serial]
+    for row, other in zip(rows, serial):
+        assert np.array_equal(row['predictions'], other['predictions'])
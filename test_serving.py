@@ -0,0 +1,139 @@
+from .serving import DecideServer, Replica, WeightStore, synthetic_load
+from .gate import (ACTIONS, STIMULI, DANGER, GATE, NORMAL,
+                   IN_DANGER_GATE_OPEN, IN_DANGER_GATE_CLOSED,
+                   rest, run, shock)
+from .pavlov import Respondant
+import multiprocessing
+import numpy as np
+import os
+import pytest
+
+
+def trained(seed=0, steps=50):
+    subject = Respondant(actions=ACTIONS, stimuli=STIMULI,
+                         environment={DANGER: 0, GATE: 0},
+                         sequence_memory=1, seed=seed)
+    for i in range(steps):
+        subject.learn(shock if i % 3 == 0 else
+                      subject.decide(randomised=0.5), epochs=5)
+    return subject
+
+
+def served(path):
+    "Predictions of a replica in another process"
+    replica = Replica(path)
+    return replica.version, [replica.predict(event, IN_DANGER_GATE_OPEN,
+                                             [shock])
+                             for event in ACTIONS]
+
+
+@pytest.mark.utility
+def test_replica(tmpdir):
+    path = os.path.join(str(tmpdir), 'store')
+    subject = trained()
+    store = WeightStore.create(path, subject)
+    assert store.version == 1
+
+    replica = Replica(path)
+    assert replica.version == 1
+    for environment in (NORMAL, IN_DANGER_GATE_OPEN):
+        for history in ([], [shock], [run]):
+            assert replica.outcomes(ACTIONS, environment, history).tolist() \
+                == [subject.predict(e, environment, history)
+                    for e in ACTIONS]
+    history = [subject.history[-1]]
+    assert replica.decide(NORMAL, history=history) == subject.decide(NORMAL)
+    assert replica.decide(NORMAL, top_k=2, history=history) == \
+        subject.decide(NORMAL, top_k=2)
+
+    # a new version is picked up without restarting
+    for i in range(20):
+        subject.learn(run, epochs=5)
+    before = replica.predict(run, IN_DANGER_GATE_OPEN, [shock])
+    assert store.publish(subject) == 2
+    after = replica.predict(run, IN_DANGER_GATE_OPEN, [shock])
+    assert replica.version == 2
+    assert before != after == subject.predict(run, IN_DANGER_GATE_OPEN,
+                                              [shock])
+    # and in other processes
+    pool = multiprocessing.Pool(2)
+    try:
+        results = pool.map(served, [path, path])
+    finally:
+        pool.close()
+        pool.join()
+    assert results[0] == results[1] == served(path)
+    assert results[0][0] == 2
+
+
+@pytest.mark.utility
+def test_store_versions(tmpdir):
+    path = os.path.join(str(tmpdir), 'store')
+    store = WeightStore.create(path, trained(steps=0))
+    replica = Replica(path)
+    with pytest.raises(ValueError):
+        replica.store.publish(trained())
+    with pytest.raises(ValueError):
+        store.publish([np.zeros(2)])
+    assert not replica.store.weights()[0].flags.writeable
+
+    # a read is retried if its weights were written over meanwhile
+    calls = []
+
+    def read():
+        calls.append(replica.version)
+        if len(calls) == 1:
+            store.publish(trained(seed=1))
+            store.publish(trained(seed=2))
+        return replica.version
+    assert replica.read(read) == 3
+    assert calls == [1, 3]
+    # but not if only the other copy was written
+    store.publish(trained(seed=3))
+    assert replica.read(lambda: store.publish(trained(seed=4))) == 5
+
+
+ENVIRONMENTS = [NORMAL, IN_DANGER_GATE_OPEN, IN_DANGER_GATE_CLOSED]
+HISTORIES = [[], [shock], [run]]
+
+
+@pytest.mark.core
+def test_decide_server(tmpdir):
+    subject = trained()
+    expected = [(subject.decide(environment, top_k=2),
+                 subject.predict(rest, environment, history))
+                for environment, history in zip(ENVIRONMENTS, HISTORIES)]
+    # queued before starting, so they're taken in full batches
+    server = DecideServer(subject, batch_size=4, max_delay=1.0)
+    decisions = [server.submit(ENVIRONMENTS[i % 3], top_k=2)
+                 for i in range(12)]
+    predictions = [server.submit_predict(rest, environment, history)
+                   for environment, history in zip(ENVIRONMENTS, HISTORIES)]
+    failed = server.submit({DANGER: 0})
+    with server:
+        assert [f.result() for f in decisions] == \
+            [expected[i % 3][0] for i in range(12)]
+        np.testing.assert_allclose([f.result() for f in predictions],
+                                   [e[1] for e in expected], rtol=1e-6)
+        with pytest.raises(KeyError):
+            failed.result()
+        assert server.decide(NORMAL) == subject.decide(NORMAL)
+    metrics = server.metrics()
+    assert metrics['requests'] == 17
+    assert metrics['batches'] == 5
+    assert metrics['p99'] >= metrics['p50'] > 0
+
+    # under a synthetic load, also serving from a store
+    path = os.path.join(str(tmpdir), 'store')
+    WeightStore.create(path, subject)
+    for served in (subject, Replica(path)):
+        with DecideServer(served, batch_size=16, max_delay=0.001) as server:
+            metrics = synthetic_load(server, ENVIRONMENTS, 300,
+                                     histories=HISTORIES, seed=0)
+            assert metrics['requests'] == 300
+            assert metrics['throughput'] > 0
+            assert metrics['batch_size'] > 1
+            server.reset_metrics()
+            metrics = synthetic_load(server, ENVIRONMENTS, 50, rate=5000,
+                                     seed=0)
+            assert metrics['requests'] == 50
@@ -0,0 +1,85 @@
+from .pavlov import Respondant
+from .sinks import FileSink, MemorySink, plot_predictions, read_predictions
+from .toy import high_action, low_action
+import numpy as np
+import pytest
+
+
+SCENARIOS = {
+    'low': (low_action, {}),
+    'high': (high_action, {}),
+}
+
+
+def alternate(subject, steps=7):
+    "Learns each action in turn, storing predictions as it goes"
+    for i in range(steps):
+        subject.learn([low_action, high_action][i % 2], epochs=10)
+        subject.store_predictions(None if i % 3 else ['high'])
+
+
+@pytest.mark.utility
+def test_memory_sink():
+    sink = MemorySink(rows=1)
+    sink.start(['a', 'b'])
+    sink.write(0, np.array([0.1, 0.2]))
+    sink.write(3, np.array([0.3, 0.4]), np.array([False, True]))
+    assert np.array_equal(sink.predictions, [[0.1, 0.2], [0.0, 0.4]])
+    assert list(sink.steps) == [0, 3]
+
+
+@pytest.mark.core
+def test_file_sink(tmpdir):
+    path = str(tmpdir.join('predictions'))
+    # a small chunk, so rows are written out as the experiment runs
+    subject = Respondant(actions=[low_action, high_action],
+                         scenarios=SCENARIOS, seed=0,
+                         sink=FileSink(path, chunk_size=3))
+    alternate(subject)
+    in_memory = Respondant(actions=[low_action, high_action],
+                           scenarios=SCENARIOS, seed=0)
+    alternate(in_memory)
+
+    # only the stored scenarios are written
+    subject.sink.close()
+    data = read_predictions(path)
+    assert data['keys'] == ('high', 'low')
+    assert len(data['value']) == 7 * 2 - 3
+    assert list(data['steps']) == list(range(7))
+    assert np.allclose(data['predictions'], in_memory.predictions)
+    assert np.allclose(subject.predictions, in_memory.predictions)
+
+    # appending to the same files carries on, for the same scenarios
+    sink = FileSink(path)
+    sink.start(['high', 'low'], subject.dtype)
+    sink.write(7, np.array([0.5, 0.5]))
+    sink.close()
+    assert len(read_predictions(path)['steps']) == 8
+    with pytest.raises(ValueError):
+        FileSink(path).start(['other'], subject.dtype)
+    with pytest.raises(ValueError):
+        FileSink(path).start(['high', 'low'], np.float64)
+
+    # plotted offline, without showing
+    plot_predictions(path, show=False)
+
+
+@pytest.mark.utility
+def test_plot_interval(tmpdir):
+    "Predictions are plotted at the steps they were stored"
+    import matplotlib.pyplot as plt
+    path = str(tmpdir.join('predictions'))
+    for sink in (None, FileSink(path)):
+        subject = Respondant(actions=[low_action, high_action],
+                             scenarios=SCENARIOS, prediction_interval=10,
+                             sink=sink)
+        for i in range(100):
+            subject.store_predictions()
+        assert list(subject.sink.steps) == list(range(0, 100, 10))
+
+        plt.figure()
+        subject.plot_predictions(show=False)
+        axes = plt.gca()
+        assert axes.get_xlim() == (0, 91)
+        assert list(axes.get_lines()[0].get_xdata()) == list(range(0, 100, 10))
+        plt.close()
@@ -0,0 +1,86 @@
+from .pavlov import Respondant, event_name, find_event
+from .replay import ReplayBuffer
+from .toy import low_action, reset, switch_action, switch_subject
+import numpy as np
+import pytest
+
+
+SCENARIOS = {
+    'low': (low_action, {'a': 0.0}),
+    'high': (switch_action, {'a': 1.0}, [reset]),
+}
+
+
+def experiment(subject, steps):
+    "Random mix of stimuli & decisions, returning what happened"
+    happened = []
+    for i in range(steps):
+        if subject.rng.random_sample() < 0.3:
+            event = reset
+        else:
+            event = subject.decide(randomised=0.5)
+        subject.learn(event, epochs=20)
+        subject.store_predictions()
+        happened.append(event)
+    return happened
+
+
+def snapshot_subject():
+    return switch_subject(stimuli=[reset], sequence_memory=2,
+                          scenarios=SCENARIOS, seed=1)
+
+
+def assert_same(subject, other):
+    "Both carry on in exactly the same way"
+    assert experiment(subject, 10) == experiment(other, 10)
+    assert np.array_equal(subject.predictions, other.predictions)
+    assert subject.environment == other.environment
+    assert subject.history == other.history
+
+
+@pytest.mark.utility
+def test_event_names():
+    name = event_name(low_action)
+    assert name.endswith('toy:low_action')
+    assert find_event(name) is low_action
+    # found by name from a list of events
+    assert find_event('elsewhere:reset', [reset]) is reset
+    with pytest.raises(ValueError):
+        find_event('nowhere:reset')
+
+
+@pytest.mark.core
+def test_save_and_load(tmpdir):
+    path = str(tmpdir.join('subject.npz'))
+    subject = snapshot_subject()
+    experiment(subject, 15)
+    subject.save(path)
+
+    loaded = Respondant.load(path)
+    assert loaded.events == subject.events
+    assert loaded.history.total == 15
+    assert loaded.predictions.shape == (15, 2)
+    assert_same(subject, loaded)
+
+    # can pass in extra arguments e.g. to train with replay
+    replayed = Respondant.load(path, replay=ReplayBuffer())
+    assert replayed.replay is not None
+
+    # saved with the .npz suffix, & loaded from either path
+    path = str(tmpdir.join('snapshot'))
+    assert subject.save(path) == path + '.npz'
+    assert_same(Respondant.load(path), Respondant.load(path + '.npz'))
+
+
+@pytest.mark.core
+def test_fork():
+    subject = snapshot_subject()
+    experiment(subject, 15)
+
+    assert_same(subject, subject.fork())
+
+    # with a new seed the same network carries on differently
+    forked = subject.fork(seed=2)
+    assert np.array_equal(forked.predict(low_action),
+                          subject.predict(low_action))
+    assert experiment(forked, 20) != experiment(subject, 20)
@@ -0,0 +1,41 @@
+from .runner import grid
+from .sweep import Sweep
+from .test_protocol import BASE_SCENARIOS, PROTOCOL
+from .toy import switch_action
+import pytest
+
+
+EXPECTED = {'1. start': switch_action, '2. start': switch_action,
+            '2. changed': switch_action}
+
+
+@pytest.mark.utility
+def test_budgets():
+    configs = grid(hidden_layers=[2, 6], steps=[0.1, 0.5], randomised=[0.5])
+    sweep = Sweep(PROTOCOL, configs, EXPECTED)
+    assert PROTOCOL.total_steps == 20
+    assert sweep.budgets() == [5, 10, 20]
+    assert Sweep(PROTOCOL, configs, EXPECTED, eta=4).budgets() == [5, 20]
+    assert Sweep(PROTOCOL, configs[:1], EXPECTED).budgets() == [20]
+    assert Sweep(PROTOCOL, configs, EXPECTED, min_steps=8).budgets() == \
+        [8, 10, 20]
+    with pytest.raises(ValueError):
+        Sweep(PROTOCOL, [], EXPECTED)
+
+
+@pytest.mark.core
+def test_successive_halving():
+    configs = grid(hidden_layers=[1, 4], steps=[0.01, 0.5],
+                   randomised=[0.1, 0.9])
+    sweep = Sweep(PROTOCOL, configs, EXPECTED, base=BASE_SCENARIOS)
+    rows = sweep.run()
+    assert len(rows) == 8
+    # halved each round, with the survivors carrying on
+    assert [row['steps_run'] for row in rows] == [20, 10, 5, 5, 2, 2, 2, 2]
+    assert [row['dropped'] for row in rows] == [None, 2, 1, 1, 0, 0, 0, 0]
+    assert sweep.steps == 48 < 8 * 20
+    assert sweep.best.done
+    assert sweep.best.subject.history.total == 20
+    # the best configs learn, so most of the checks are as expected
+    assert rows[0]['score'][0] >= 2.0 / 3
+    assert len(sweep.log) == 8 + 4 + 2 + 1
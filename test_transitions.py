@@ -0,0 +1,75 @@
+from .gate import ACTIONS, STIMULI, DANGER, GATE, shock
+from .pavlov import Respondant
+from .transitions import TransitionLog, chunks, load_transitions
+import numpy as np
+import os
+import pytest
+
+
+def gate_subject(**kwargs):
+    return Respondant(actions=ACTIONS, stimuli=STIMULI,
+                      environment={DANGER: 0, GATE: 0},
+                      sequence_memory=2, seed=0, **kwargs)
+
+
+def recorded(steps=30, **kwargs):
+    "A subject which has learnt from a few steps, with its transitions"
+    subject = gate_subject(**kwargs)
+    log = TransitionLog(subject)
+    for i in range(steps):
+        subject.learn(shock if i % 5 == 0 else
+                      subject.decide(randomised=0.5), epochs=1)
+    return subject, log
+
+
+@pytest.mark.core
+@pytest.mark.parametrize('sparse', [False, True])
+def test_fit_matches_learn(sparse):
+    "Fitting one row at a time, in order, is the same as learning"
+    subject, log = recorded(sparse=sparse)
+    assert len(log) == 30
+    fitted = gate_subject(sparse=sparse)
+    assert fitted.fit(log.arrays(), batch_size=1, shuffle=False) == 30
+    assert fitted.weight_version == 1
+    for a, b in zip(subject.net.get_weights(), fitted.net.get_weights()):
+        np.testing.assert_allclose(a, b, rtol=1e-5)
+
+
+@pytest.mark.utility
+def test_saved_transitions(tmpdir):
+    subject, log = recorded()
+    arrays = log.arrays()
+    assert arrays['history'].shape == (30, 2)
+    assert arrays['environment'].shape == (30, 2)
+
+    for path in (os.path.join(str(tmpdir), 'log'),
+                 os.path.join(str(tmpdir), 'log.npz')):
+        log.save(path)
+        loaded = load_transitions(path)
+        for name in arrays:
+            assert np.array_equal(loaded[name], arrays[name])
+    assert isinstance(load_transitions(os.path.join(str(tmpdir), 'log'))[
+        'event'], np.memmap)
+
+    # chunked & shuffled over a couple of epochs
+    fitted = gate_subject()
+    path = os.path.join(str(tmpdir), 'log')
+    assert fitted.fit(path, epochs=2, batch_size=8, chunk_size=16) == 8
+    rows = [len(chunk['outcome']) for chunk in chunks(arrays, 16)]
+    assert rows == [16, 14]
+    assert fitted.fit(lambda: chunks(arrays, 16), epochs=2,
+                      batch_size=8) == 8
+
+
+@pytest.mark.utility
+def test_fit_errors():
+    subject, log = recorded(5)
+    arrays = log.arrays()
+    with pytest.raises(ValueError):
+        subject.fit(chunks(arrays, 2), epochs=2)
+    with pytest.raises(ValueError):
+        Respondant(actions=ACTIONS, environment={DANGER: 0, GATE: 0},
+                   sequence_memory=1).fit(arrays)
+    arrays['environment'][0, 0] = 2.0
+    with pytest.raises(ValueError):
+        subject.fit(arrays)
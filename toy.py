@@ -0,0 +1,35 @@
+"""
+Toy events shared by the tests,
+with a single environment variable 'a'
+"""
+from .pavlov import Respondant
+
+
+def low_action(environment):
+    "An action which returns a low outcome"
+    return 0.1, environment
+
+
+def high_action(environment):
+    "An action which returns a high outcome"
+    return 0.9, environment
+
+
+def switch_action(environment):
+    "An action which changes the environment & returns a high outcome"
+    environment['a'] = 1 - environment['a']
+    return 0.9, environment
+
+
+def reset(environment):
+    "A stimulus which resets the environment"
+    environment['a'] = 0.0
+    return 0.0, environment
+
+
+def switch_subject(**kwargs):
+    "Respondant choosing between the low & switch actions"
+    settings = dict(actions=[low_action, switch_action],
+                    environment={'a': 0.0}, sequence_memory=1, seed=0)
+    settings.update(kwargs)
+    return Respondant(**settings)
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+
+
+# fields of a transition, with their types
+# the event & history are encoder table rows, events in the order of
+# Respondant.events (actions then stimuli), the history latest first
+# (-1 if none yet) and the environment values in sorted key order
+FIELDS = (
+    ('event', np.int32),
+    ('history', np.int32),
+    ('environment', None),
+    ('outcome', None),
+)
+# rows of each chunk read from a dataset when fitting
+CHUNK_SIZE = 65536
+
+
+class TransitionLog(object):
+    """
+    Records the transitions a respondant learns from,
+    (the event, the history & environment before it, and its outcome)
+    as a dataset for Respondant.fit, which can be saved with save
+    """
+    def __init__(self, respondant):
+        self.respondant = respondant
+        self.rows = dict((name, []) for name, dtype in FIELDS)
+        respondant.add_hook('pre_learn', self.pre_learn)
+        respondant.add_hook('post_learn', self.post_learn)
+
+    def pre_learn(self, respondant, event):
+        encoder = respondant.encoder
+        self.rows['event'].append(encoder.lookup(event))
+        self.rows['history'].append(encoder.window.copy())
+        self.rows['environment'].append(
+            encoder.environment_values(respondant.environment))
+
+    def post_learn(self, respondant, event, outcome):
+        self.rows['outcome'].append(outcome)
+
+    def __len__(self):
+        return len(self.rows['outcome'])
+
+    def arrays(self):
+        "The transitions as a dict of arrays"
+        encoder = self.respondant.encoder
+        shapes = {'history': (len(self), encoder.sequence_memory),
+                  'environment': (len(self), len(encoder.keys))}
+        arrays = {}
+        for name, dtype in FIELDS:
+            arrays[name] = np.array(self.rows[name], dtype=dtype or
+                                    encoder.dtype)
+            arrays[name] = arrays[name].reshape(shapes.get(name, (-1,)))
+        return arrays
+
+    def save(self, path):
+        "Saves the transitions to an .npz file or a directory of .npy files"
+        save_transitions(path, self.arrays())
+
+
+def save_transitions(path, arrays):
+    """
+    Saves transitions (a dict of arrays) to an .npz file,
+    or a directory of .npy files, which can be memory mapped
+    """
+    if path.endswith('.npz'):
+        np.savez(path, **arrays)
+        return
+    if not os.path.exists(path):
+        os.makedirs(path)
+    for name, dtype in FIELDS:
+        np.save(os.path.join(path, name + '.npy'), arrays[name])
+
+
+def load_transitions(path):
+    """
+    Loads transitions saved by save_transitions as a dict of arrays,
+    memory mapped from a directory so only the rows used are read
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return dict((name, data[name]) for name, dtype in FIELDS)
+    return dict((name, np.load(os.path.join(path, name + '.npy'),
+                               mmap_mode='r'))
+                for name, dtype in FIELDS)
+
+
+def chunks(transitions, chunk_size=CHUNK_SIZE, rng=None):
+    """
+    Yields transitions as chunks (dicts of arrays) of at most chunk_size
+    rows. Given a path (see load_transitions), a dict of arrays,
+    or an iterable of chunks which are passed on as they are.
+    If given a RandomState, the chunks of arrays are in a random order
+    """
+    if isinstance(transitions, str):
+        transitions = load_transitions(transitions)
+    if not isinstance(transitions, dict):
+        for chunk in transitions:
+            yield chunk
+        return
+    starts = np.arange(0, len(transitions['outcome']), chunk_size)
+    if rng is not None:
+        rng.shuffle(starts)
+    for start in starts:
+        yield dict((name, transitions[name][start:start + chunk_size])
+                   for name, dtype in FIELDS)